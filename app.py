@@ -1,20 +1,26 @@
 import streamlit as st
-import pandas as pd
 import time
-import os
-from io import BytesIO
 from url_resolver import URLResolver
 from wayback_archiver import WaybackArchiver
 from spreadsheet_processor import SpreadsheetProcessor
+from batch_processor import BatchProcessor, RESULT_COLUMNS, ARCHIVE_SUBMITTED
+from http_session import create_session
+from url_cache import URLCache
 
 # Initialize components
 @st.cache_resource
 def get_components():
     """Initialize and cache the application components"""
+    # One pooled session per component, reused across every URL and rerun
+    url_resolver = URLResolver(session=create_session())
+    wayback_archiver = WaybackArchiver(session=create_session())
     return {
-        'url_resolver': URLResolver(),
-        'wayback_archiver': WaybackArchiver(),
-        'spreadsheet_processor': SpreadsheetProcessor()
+        'url_resolver': url_resolver,
+        'wayback_archiver': wayback_archiver,
+        'spreadsheet_processor': SpreadsheetProcessor(),
+        # Streamlit runs as a long-lived server, so Wayback saves can finish in the background
+        'batch_processor': BatchProcessor(url_resolver, wayback_archiver, retry_delay=1, cache=URLCache(),
+                                          archive_in_background=True)
     }
 
 def main():
@@ -29,9 +35,8 @@ def main():
     
     # Initialize components
     components = get_components()
-    url_resolver = components['url_resolver']
-    wayback_archiver = components['wayback_archiver']
     spreadsheet_processor = components['spreadsheet_processor']
+    batch_processor = components['batch_processor']
     
     # Sidebar configuration
     with st.sidebar:
@@ -45,7 +50,7 @@ def main():
             max_value=5.0,
             value=1.0,
             step=0.1,
-            help="Delay to respect service rate limits"
+            help="Minimum delay between requests to the same domain, to respect service rate limits"
         )
         
         # Retry settings
@@ -73,8 +78,8 @@ def main():
         st.header("📁 File Upload")
         uploaded_file = st.file_uploader(
             "Upload your spreadsheet containing shortened URLs",
-            type=['csv', 'xlsx', 'xls'],
-            help="Supported formats: CSV, Excel (.xlsx, .xls)"
+            type=[ext.lstrip('.') for ext in spreadsheet_processor.supported_formats],
+            help=f"Supported formats: {', '.join(spreadsheet_processor.supported_formats)}"
         )
         
         if uploaded_file is not None:
@@ -102,8 +107,15 @@ def main():
                 
                 # Process URLs button
                 if st.button("🚀 Start Processing URLs", type="primary", use_container_width=True):
-                    process_urls(df, url_column_name, url_resolver, wayback_archiver, 
-                               delay_between_requests, max_retries)
+                    results = process_urls(df, url_column_name, batch_processor,
+                                           delay_between_requests, max_retries)
+                    if results:
+                        # Keep results across reruns (e.g. clicking a download button)
+                        results['source'] = uploaded_file.name
+                        st.session_state['processed_results'] = results
+                        show_results(results)
+                elif st.session_state.get('processed_results', {}).get('source') == uploaded_file.name:
+                    show_results(st.session_state['processed_results'])
                     
             except Exception as e:
                 st.error(f"❌ Error loading file: {str(e)}")
@@ -127,165 +139,164 @@ def main():
         - `resolved_url`: Final destination
         - `redirect_chain`: Full redirect path
         - `wayback_url`: Archive link
-        - `status`: Processing result
+        - `status`: Processing result ("Archive submitted" while the Wayback Machine save runs in the background)
         - `error_message`: Error details (if any)
         """)
 
-def process_urls(df, url_column_name, url_resolver, wayback_archiver, delay, max_retries):
-    """Process URLs in the dataframe"""
+def process_urls(df, url_column_name, batch_processor, delay, max_retries):
+    """Process URLs in the dataframe and return the results with summary counts"""
+    
+    spreadsheet_processor = get_components()['spreadsheet_processor']
+    df = spreadsheet_processor.use_string_dtype(df, [url_column_name])
     
     # Initialize result columns
-    df['resolved_url'] = ''
-    df['redirect_chain'] = ''
-    df['wayback_url'] = ''
-    df['status'] = ''
-    df['error_message'] = ''
+    df = spreadsheet_processor.add_empty_columns(df, RESULT_COLUMNS)
     
-    # Filter rows with non-empty URLs
-    urls_to_process = df[df[url_column_name].notna() & (df[url_column_name] != '')]
-    total_urls = len(urls_to_process)
+    # Pick rows with non-empty URLs
+    row_labels, urls = spreadsheet_processor.select_urls(df, url_column_name)
+    total_urls = len(urls)
     
     if total_urls == 0:
         st.warning("⚠️ No URLs found to process")
-        return
+        return None
     
     # Progress tracking
     progress_bar = st.progress(0)
     status_container = st.container()
-    results_container = st.container()
     
     processed_count = 0
     success_count = 0
+    submitted_count = 0
     error_count = 0
     
     with status_container:
         status_text = st.empty()
-        metrics_cols = st.columns(4)
+        metrics_cols = st.columns(5)
         
+        # Placeholders are created once and updated in place
         with metrics_cols[0]:
-            total_metric = st.metric("Total URLs", total_urls)
+            st.metric("Total URLs", total_urls)
         with metrics_cols[1]:
-            processed_metric = st.metric("Processed", processed_count)
+            processed_metric = st.empty()
+            processed_metric.metric("Processed", processed_count)
         with metrics_cols[2]:
-            success_metric = st.metric("Successful", success_count)
+            success_metric = st.empty()
+            success_metric.metric("Successful", success_count)
         with metrics_cols[3]:
-            error_metric = st.metric("Errors", error_count)
+            submitted_metric = st.empty()
+            submitted_metric.metric("Archive submitted", submitted_count)
+        with metrics_cols[4]:
+            error_metric = st.empty()
+            error_metric.metric("Errors", error_count)
     
-    # Process each URL
-    for idx, row in urls_to_process.iterrows():
-        original_url = row[url_column_name]
-        
-        status_text.text(f"Processing: {original_url[:50]}...")
+    # Each UI update is a round trip to the browser, so refresh about 200 times per batch at most
+    update_every = max(1, total_urls // 200)
+    
+    # Process URLs concurrently, updating progress as each one completes
+    results = [BatchProcessor.make_result() for _ in urls]
+    
+    for position, result in batch_processor.process_urls(urls, max_retries, delay=delay):
+        results[position] = result
         
-        try:
-            # Resolve URL with retries
-            resolved_url, redirect_chain = resolve_with_retries(
-                url_resolver, original_url, max_retries
-            )
-            
-            if resolved_url:
-                # Archive in Wayback Machine
-                wayback_url = archive_with_retries(
-                    wayback_archiver, resolved_url, max_retries
-                )
-                
-                # Update dataframe
-                df.at[idx, 'resolved_url'] = resolved_url
-                df.at[idx, 'redirect_chain'] = ' -> '.join(redirect_chain)
-                df.at[idx, 'wayback_url'] = wayback_url if wayback_url else 'Failed to archive'
-                df.at[idx, 'status'] = 'Success'
-                df.at[idx, 'error_message'] = ''
-                
-                success_count += 1
-            else:
-                df.at[idx, 'status'] = 'Failed'
-                df.at[idx, 'error_message'] = 'Unable to resolve URL'
-                error_count += 1
-                
-        except Exception as e:
-            df.at[idx, 'status'] = 'Error'
-            df.at[idx, 'error_message'] = str(e)
+        if result['status'] == 'Success':
+            success_count += 1
+        elif result['status'] == ARCHIVE_SUBMITTED:
+            # Resolved, but the background save may still fail
+            submitted_count += 1
+        else:
             error_count += 1
         
         processed_count += 1
         
-        # Update progress
-        progress = processed_count / total_urls
-        progress_bar.progress(progress)
-        
-        # Update metrics
-        with metrics_cols[1]:
-            st.metric("Processed", processed_count)
-        with metrics_cols[2]:
-            st.metric("Successful", success_count)
-        with metrics_cols[3]:
-            st.metric("Errors", error_count)
-        
-        # Rate limiting
-        if processed_count < total_urls:  # Don't delay after the last URL
-            time.sleep(delay)
+        if processed_count % update_every == 0 or processed_count == total_urls:
+            status_text.text(f"Processed: {urls[position][:50]}...")
+            
+            # Update progress
+            progress_bar.progress(processed_count / total_urls)
+            
+            # Update metrics
+            processed_metric.metric("Processed", processed_count)
+            success_metric.metric("Successful", success_count)
+            submitted_metric.metric("Archive submitted", submitted_count)
+            error_metric.metric("Errors", error_count)
+    
+    # Write all results back with one assignment per column
+    for column in RESULT_COLUMNS:
+        df.loc[row_labels, column] = [result[column] for result in results]
+    df = spreadsheet_processor.downcast_integers(df)
     
     # Processing complete
     status_text.text("✅ Processing complete!")
     
-    # Show results
-    with results_container:
-        st.header("📊 Processing Results")
-        
-        # Summary metrics
-        st.subheader("Summary")
-        summary_cols = st.columns(4)
-        with summary_cols[0]:
-            st.metric("Total Processed", processed_count)
-        with summary_cols[1]:
-            st.metric("Success Rate", f"{(success_count/processed_count)*100:.1f}%")
-        with summary_cols[2]:
-            st.metric("Successful", success_count)
-        with summary_cols[3]:
-            st.metric("Failed", error_count)
-        
-        # Show updated dataframe
-        st.subheader("Updated Data")
-        st.dataframe(df, use_container_width=True)
-        
-        # Download processed file
-        st.subheader("📥 Download Results")
-        
-        # Prepare download
-        output_buffer = BytesIO()
-        with pd.ExcelWriter(output_buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Processed_URLs')
-        
+    return {
+        'df': df,
+        'processed': processed_count,
+        'successful': success_count,
+        'submitted': submitted_count,
+        'failed': error_count
+    }
+
+@st.cache_data(show_spinner=False)
+def to_xlsx_bytes(df):
+    """Serialize results to Excel, computed once per distinct DataFrame"""
+    return get_components()['spreadsheet_processor'].export_to_excel_streaming(df)
+
+@st.cache_data(show_spinner=False)
+def to_csv_bytes(df):
+    """Serialize results to CSV, computed once per distinct DataFrame"""
+    return get_components()['spreadsheet_processor'].export_to_csv(df)
+
+def show_results(results):
+    """Show processing results and download buttons"""
+    df = results['df']
+    processed_count = results['processed']
+    success_count = results['successful']
+    submitted_count = results['submitted']
+    error_count = results['failed']
+    
+    st.header("📊 Processing Results")
+    
+    # Summary metrics
+    st.subheader("Summary")
+    summary_cols = st.columns(5)
+    with summary_cols[0]:
+        st.metric("Total Processed", processed_count)
+    with summary_cols[1]:
+        st.metric("Success Rate", f"{(success_count/processed_count)*100:.1f}%")
+    with summary_cols[2]:
+        st.metric("Successful", success_count)
+    with summary_cols[3]:
+        st.metric("Archive submitted", submitted_count)
+    with summary_cols[4]:
+        st.metric("Failed", error_count)
+    
+    # Show updated dataframe
+    st.subheader("Updated Data")
+    st.dataframe(df, use_container_width=True)
+    
+    # Download processed file
+    st.subheader("📥 Download Results")
+    
+    # Prepare downloads - CSV is much cheaper to produce than Excel
+    download_cols = st.columns(2)
+    
+    with download_cols[0]:
         st.download_button(
             label="📥 Download Processed Spreadsheet",
-            data=output_buffer.getvalue(),
+            data=to_xlsx_bytes(df),
             file_name=f"processed_urls_{int(time.time())}.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             type="primary",
             use_container_width=True
         )
-
-def resolve_with_retries(url_resolver, url, max_retries):
-    """Resolve URL with retry mechanism"""
-    for attempt in range(max_retries + 1):
-        try:
-            return url_resolver.resolve_url(url)
-        except Exception as e:
-            if attempt == max_retries:
-                raise e
-            time.sleep(1)  # Brief delay before retry
-    return None, []
-
-def archive_with_retries(wayback_archiver, url, max_retries):
-    """Archive URL with retry mechanism"""
-    for attempt in range(max_retries + 1):
-        try:
-            return wayback_archiver.archive_url(url)
-        except Exception as e:
-            if attempt == max_retries:
-                return None
-            time.sleep(1)  # Brief delay before retry
-    return None
+    with download_cols[1]:
+        st.download_button(
+            label="📥 Download as CSV",
+            data=to_csv_bytes(df),
+            file_name=f"processed_urls_{int(time.time())}.csv",
+            mime="text/csv",
+            use_container_width=True
+        )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,284 @@
+import copy
+import time
+import threading
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from typing import Iterator, List, Optional, Tuple
+from http_session import with_retries
+
+# Columns added to the spreadsheet for every processed URL
+RESULT_COLUMNS = ['resolved_url', 'redirect_chain', 'wayback_url', 'status', 'error_message']
+
+# Status of URLs whose Wayback Machine save was handed to the background pool and may still fail
+ARCHIVE_SUBMITTED = 'Archive submitted'
+
+def url_domain(url: str) -> str:
+    """
+    Extract the lowercased host of a URL, which may lack a scheme
+
+    Args:
+        url: URL as given in the spreadsheet
+
+    Returns:
+        Host part of the URL
+    """
+    return urlsplit(url if '://' in url else '//' + url).netloc.lower()
+
+class DomainRateLimiter:
+    """Enforces a minimum delay between requests to the same domain"""
+
+    def __init__(self, delay: float, domain_delays: Optional[dict] = None):
+        """
+        Initialize rate limiter
+
+        Args:
+            delay: Minimum seconds between two requests to the same domain
+            domain_delays: Per-domain minimum delays that apply even when delay is lower
+        """
+        self.delay = delay
+        self.domain_delays = domain_delays or {}
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url: str):
+        """
+        Block until a request to the URL's domain is allowed
+
+        Args:
+            url: URL about to be requested
+        """
+        domain = url_domain(url)
+        delay = max(self.delay, self.domain_delays.get(domain, 0))
+        if delay <= 0:
+            return
+
+        # Reserve the next free slot for this domain, then sleep outside the lock
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(domain, now))
+            self._next_slot[domain] = slot + delay
+
+        if slot > now:
+            time.sleep(slot - now)
+
+class BatchProcessor:
+    """Resolves and archives batches of URLs concurrently"""
+
+    def __init__(self, url_resolver, wayback_archiver, max_workers: int = 8, retry_delay: float = 0.1,
+                 cache=None, archive_in_background: bool = False, archive_workers: int = 16,
+                 archive_interval: float = 0.1):
+        """
+        Initialize batch processor
+
+        Args:
+            url_resolver: URLResolver used to follow redirect chains
+            wayback_archiver: WaybackArchiver used to archive resolved URLs
+            max_workers: Maximum number of URLs processed at the same time
+            retry_delay: Backoff factor for retries - urllib3 waits retry_delay * 2 ** (retry - 1)
+            cache: Optional URLCache consulted before any network request
+            archive_in_background: Submit Wayback Machine saves without waiting for them.
+                Only suitable for long-running processes - serverless functions may be
+                frozen before the background saves finish.
+            archive_workers: Maximum number of background archive requests
+            archive_interval: Minimum seconds between Wayback Machine requests, whatever
+                the per-domain delay - the default allows 10 per second
+        """
+        self.url_resolver = url_resolver
+        self.wayback_archiver = wayback_archiver
+        self.max_workers = max_workers
+        self.retry_delay = retry_delay
+        self.cache = cache
+        self.archive_in_background = archive_in_background
+        self.archive_interval = archive_interval
+        self.archive_executor = ThreadPoolExecutor(max_workers=archive_workers) if archive_in_background else None
+
+    def process_urls(self, urls: List[str], max_retries: int = 1, delay: float = 0.0,
+                     timeout: Optional[float] = None) -> Iterator[Tuple[int, dict]]:
+        """
+        Process URLs concurrently, yielding results as soon as each one completes
+
+        Duplicate URLs are resolved and archived once, and the shared result is
+        yielded for every position they appear at.
+
+        Args:
+            urls: URLs to resolve and archive
+            max_retries: Maximum retries per request for connection failures and server errors
+            delay: Minimum seconds between requests to the same domain
+            timeout: Seconds to wait before reporting unfinished URLs as skipped
+
+        Yields:
+            Tuples of (position in urls, result dictionary keyed by RESULT_COLUMNS)
+        """
+        positions_by_url = {}
+        for position, url in enumerate(urls):
+            positions_by_url.setdefault(url, []).append(position)
+
+        batch = self.with_retries(max_retries)
+
+        # Every worker archives through the same API, so keep it under its rate limit
+        # even when the other domains are not paced
+        rate_limiter = DomainRateLimiter(delay, {
+            url_domain(self.wayback_archiver.save_api_url): self.archive_interval
+        })
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        futures = {
+            executor.submit(batch.process_url, url, rate_limiter): url
+            for url in positions_by_url
+        }
+        pending = set(futures)
+
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                pending.discard(future)
+                result = future.result()
+                for position in positions_by_url[futures[future]]:
+                    yield position, result
+        except FuturesTimeoutError:
+            # Report whatever did not finish in time instead of blocking the caller
+            skipped = self.make_result(
+                status='Skipped',
+                error_message='Skipped to avoid timeout - process in smaller batches'
+            )
+            for future in pending:
+                future.cancel()
+                for position in positions_by_url[futures[future]]:
+                    yield position, skipped
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def with_retries(self, max_retries: int) -> 'BatchProcessor':
+        """
+        Copy the processor for one batch, with resolver and archiver sessions using its retry count
+
+        Retries happen inside urllib3, so only connection failures and server errors
+        are retried, without re-running the redirect walk or the archive lookup. The
+        shared sessions aren't modified, so concurrent batches (like other Streamlit
+        users) and background archiving keep their own retry counts.
+
+        Args:
+            max_retries: Maximum retries per request
+
+        Returns:
+            Processor sharing this one's cache, archive executor and connection pools
+        """
+        batch = copy.copy(self)
+        for name in ('url_resolver', 'wayback_archiver'):
+            component = getattr(self, name)
+            session = getattr(component, 'session', None)
+            if session is not None:
+                component = copy.copy(component)
+                component.session = with_retries(session, max_retries, backoff_factor=self.retry_delay)
+                setattr(batch, name, component)
+        return batch
+
+    def process_url(self, url: str, rate_limiter: Optional[DomainRateLimiter] = None) -> dict:
+        """
+        Resolve a single URL and archive its final destination
+
+        Args:
+            url: The URL to process
+            rate_limiter: Optional limiter pacing requests per domain
+
+        Returns:
+            Result dictionary keyed by RESULT_COLUMNS
+        """
+        try:
+            resolved_url, redirect_chain = self.resolve(url, rate_limiter)
+
+            if not resolved_url:
+                return self.make_result(status='Failed', error_message='Unable to resolve URL')
+
+            # Archive in Wayback Machine
+            status = 'Success'
+            if self.archive_executor:
+                wayback_url, submitted = self.submit_archive(resolved_url, rate_limiter)
+                if submitted:
+                    status = ARCHIVE_SUBMITTED
+            else:
+                wayback_url = self.archive(resolved_url, rate_limiter)
+
+            return self.make_result(
+                resolved_url=resolved_url,
+                redirect_chain=' -> '.join(redirect_chain) if redirect_chain else url,
+                wayback_url=wayback_url if wayback_url else 'Failed to archive',
+                status=status
+            )
+
+        except Exception as e:
+            return self.make_result(status='Error', error_message=str(e))
+
+    def resolve(self, url: str, rate_limiter: Optional[DomainRateLimiter] = None):
+        """Resolve URL, using the cache when possible"""
+        if self.cache:
+            cached = self.cache.get_resolution(url)
+            if cached:
+                return cached
+
+        if rate_limiter:
+            rate_limiter.wait(url)
+        resolved_url, redirect_chain, complete = self.url_resolver.resolve_url_status(url)
+        # A walk that stopped on an error status or a redirect loop may resolve later, so don't keep it
+        if self.cache and resolved_url and complete:
+            self.cache.set_resolution(url, resolved_url, redirect_chain)
+        return resolved_url, redirect_chain
+
+    def archive(self, url: str, rate_limiter: Optional[DomainRateLimiter] = None) -> str:
+        """Archive URL, using the cache when possible"""
+        if self.cache:
+            cached = self.cache.get_archive(url)
+            if cached:
+                return cached
+
+        try:
+            # Every archive request goes to the Wayback Machine, so pace them as one domain
+            if rate_limiter:
+                rate_limiter.wait(self.wayback_archiver.save_api_url)
+            result = self.wayback_archiver.archive_url(url)
+        except Exception as e:
+            return f'Archive error: {str(e)[:30]}...'
+
+        # Only cache real snapshot links, never status messages (like "Rate limited")
+        if self.cache and result and result.startswith('https://web.archive.org/web/'):
+            self.cache.set_archive(url, result)
+        return result or 'Failed to archive'
+
+    def submit_archive(self, url: str, rate_limiter: Optional[DomainRateLimiter] = None) -> Tuple[str, bool]:
+        """
+        Submit a Wayback Machine save without waiting for it to finish
+
+        Save Page Now completes server-side, so the archive request is handed to a
+        background pool and a predictable Wayback Machine link is returned right away.
+        Once the save finishes its real snapshot link is cached for later runs. The save
+        can still fail or be rate limited, so callers report the URL as ARCHIVE_SUBMITTED
+        rather than as archived.
+
+        Args:
+            url: URL to archive
+            rate_limiter: Optional limiter pacing requests per domain
+
+        Returns:
+            Tuple of (link, submitted) - the cached snapshot URL and False if known,
+            otherwise the Wayback Machine listing for the URL and True
+        """
+        if self.cache:
+            cached = self.cache.get_archive(url)
+            if cached:
+                return cached, False
+
+        self.archive_executor.submit(self.archive, url, rate_limiter)
+        return f'https://web.archive.org/web/*/{url}', True
+
+    @staticmethod
+    def make_result(**values) -> dict:
+        """
+        Build a result dictionary with every result column present
+
+        Args:
+            **values: Column values to set
+
+        Returns:
+            Dictionary keyed by RESULT_COLUMNS, defaulting to empty strings
+        """
+        result = dict.fromkeys(RESULT_COLUMNS, '')
+        result.update(values)
+        return result
@@ -0,0 +1,125 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Iterable, Optional
+
+# Server errors worth retrying. 429 is left to the callers, which report rate limiting
+# instead of sleeping for an arbitrarily long Retry-After
+RETRY_STATUSES = (500, 502, 503, 504)
+
+def make_retry(retries: int = 0, backoff_factor: float = 0.1) -> Retry:
+    """
+    Build the transport-level retry policy for a session
+
+    Connection failures and server errors are retried inside urllib3. Read timeouts
+    are not, since a host that hung once is likely to hang again.
+
+    Args:
+        retries: Maximum number of retries per request
+        backoff_factor: urllib3 sleeps backoff_factor * 2 ** (retry - 1) between retries
+
+    Returns:
+        Retry configuration for an HTTPAdapter
+    """
+    return Retry(
+        total=retries,
+        read=False,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['HEAD', 'GET']),
+        backoff_factor=backoff_factor,
+        raise_on_status=False,  # Hand the last response back instead of raising
+        respect_retry_after_header=False
+    )
+
+def with_retries(session: requests.Session, retries: int, backoff_factor: float = 0.1) -> requests.Session:
+    """
+    Derive a session that sends requests through the same connection pools with its own retry policy
+
+    The session passed in is left untouched, so sessions shared between users or
+    background work keep their retry policy. Don't close the derived session: its
+    adapters share the original adapters' pools.
+
+    Args:
+        session: Session created by create_session
+        retries: Maximum number of retries per request
+        backoff_factor: urllib3 sleeps backoff_factor * 2 ** (retry - 1) between retries
+
+    Returns:
+        New session with the same headers, cookies and redirect limit
+    """
+    derived = requests.Session()
+    derived.headers = session.headers.copy()
+    derived.cookies = session.cookies
+    derived.max_redirects = session.max_redirects
+
+    retry = make_retry(retries, backoff_factor)
+    for prefix, adapter in session.adapters.items():
+        derived_adapter = HTTPAdapter(max_retries=retry)
+        derived_adapter.poolmanager = adapter.poolmanager
+        derived_adapter.proxy_manager = adapter.proxy_manager
+        derived.mount(prefix, derived_adapter)
+
+    return derived
+
+def create_session(pool_connections: int = 32, pool_maxsize: int = 64,
+                   headers: Optional[dict] = None, max_redirects: int = 10,
+                   retries: int = 0) -> requests.Session:
+    """
+    Create a requests session with a pooled HTTP adapter
+
+    Reusing one session keeps connections to the same host alive, so repeated
+    requests to a shortener or the Wayback Machine skip the TCP and TLS handshake.
+
+    Args:
+        pool_connections: Number of per-host connection pools to cache
+        pool_maxsize: Maximum number of connections kept per host
+        headers: Default headers to send with every request
+        max_redirects: Redirects followed by requests that use allow_redirects
+        retries: Retries for connection failures and server errors
+
+    Returns:
+        Configured requests session
+    """
+    session = requests.Session()
+    session.max_redirects = max_redirects  # requests defaults to 30
+
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=make_retry(retries)
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    if headers:
+        session.headers.update(headers)
+
+    return session
+
+def warm_connections(session: requests.Session, hosts: Iterable[str], timeout: float = 1.0) -> threading.Thread:
+    """
+    Open keep-alive connections to hosts in the background
+
+    A HEAD request per host resolves its DNS and completes the TCP and TLS
+    handshakes, leaving an idle connection in the session's pool for the first
+    real request. Failures are ignored.
+
+    Args:
+        session: Session whose pools should be warmed
+        hosts: Host names to connect to over HTTPS
+        timeout: Seconds to wait for each host
+
+    Returns:
+        The started daemon thread
+    """
+    def warm():
+        for host in hosts:
+            try:
+                session.head(f'https://{host}/', timeout=timeout, allow_redirects=False)
+            except Exception:
+                pass
+
+    thread = threading.Thread(target=warm, daemon=True)
+    thread.start()
+    return thread
@@ -1,11 +1,31 @@
-from flask import Flask, render_template_string, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file
+from flask.json.provider import DefaultJSONProvider
 import pandas as pd
 import time
-import io
+import gzip
+import hashlib
 import os
+import tempfile
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, which encodes and decodes far faster than the json module"""
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=self.default,
+                            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+if orjson is not None:
+    app.json = ORJSONProvider(app)
 
 # Configure for Vercel
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
@@ -18,11 +38,27 @@ try:
     from url_resolver import URLResolver
     from wayback_archiver import WaybackArchiver
     from spreadsheet_processor import SpreadsheetProcessor
+    from batch_processor import BatchProcessor, RESULT_COLUMNS
+    from http_session import create_session, warm_connections
+    from url_cache import URLCache
+    from result_store import ResultStore
     
-    # Initialize components
-    url_resolver = URLResolver()
-    wayback_archiver = WaybackArchiver()
+    # Initialize components, each with one pooled session reused across all requests
+    url_resolver = URLResolver(session=create_session())
+    wayback_archiver = WaybackArchiver(session=create_session())
     spreadsheet_processor = SpreadsheetProcessor()
+    # Archiving stays synchronous: Vercel freezes the function once the response is sent,
+    # so background saves would never be guaranteed to run. The work is network bound, so
+    # 20 URLs run at once to fit more of the batch into Vercel's time budget
+    batch_processor = BatchProcessor(url_resolver, wayback_archiver, max_workers=20,
+                                     retry_delay=0.1,  # Very short retry delay for Vercel
+                                     cache=URLCache())
+    result_store = ResultStore()
+    
+    # Cold starts are when the time budget is tightest, so connect to the busiest hosts up front
+    warm_connections(url_resolver.session, ['bit.ly', 'tinyurl.com', 't.co', 'goo.gl', 'ow.ly',
+                                            'buff.ly', 'is.gd', 'cutt.ly', 'rebrand.ly', 'amzn.to'])
+    warm_connections(wayback_archiver.session, ['archive.org', 'web.archive.org'])
     modules_loaded = True
 except ImportError as e:
     error_message = f"Import error: {e}"
@@ -38,178 +74,7 @@ HTML_TEMPLATE = '''
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>SMS URL Analyzer</title>
-    <style>
-        * {
-            box-sizing: border-box;
-            margin: 0;
-            padding: 0;
-        }
-        
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            line-height: 1.6;
-            color: #333;
-            background: linear-gradient(135deg, #dc3545 0%, #c82333 100%);
-            min-height: 100vh;
-            padding: 20px;
-        }
-        
-        .container {
-            max-width: 1200px;
-            margin: 0 auto;
-            background: rgba(255, 255, 255, 0.95);
-            border-radius: 20px;
-            box-shadow: 0 20px 40px rgba(0, 0, 0, 0.15);
-            overflow: hidden;
-        }
-        
-        .header {
-            background: linear-gradient(135deg, #dc3545 0%, #c82333 100%);
-            color: white;
-            text-align: center;
-            padding: 40px 30px;
-        }
-        
-        .header h1 {
-            font-size: 2.5rem;
-            font-weight: 700;
-            margin-bottom: 10px;
-        }
-        
-        .content {
-            padding: 40px;
-        }
-        
-        .warning {
-            background: #fff3cd;
-            border: 1px solid #ffeaa7;
-            color: #856404;
-            padding: 15px;
-            border-radius: 10px;
-            margin-bottom: 20px;
-        }
-        
-        .upload-section {
-            background: #f8f9fa;
-            border: 3px dashed #dee2e6;
-            border-radius: 15px;
-            padding: 40px;
-            text-align: center;
-            margin-bottom: 30px;
-            transition: all 0.3s ease;
-        }
-        
-        .upload-section:hover {
-            border-color: #dc3545;
-            background: #ffebee;
-        }
-        
-        .settings {
-            background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
-            border-radius: 15px;
-            padding: 30px;
-            margin-bottom: 30px;
-        }
-        
-        .form-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(280px, 1fr));
-            gap: 25px;
-        }
-        
-        .form-group {
-            margin-bottom: 0;
-        }
-        
-        .form-group label {
-            display: block;
-            margin-bottom: 8px;
-            font-weight: 600;
-            color: #495057;
-        }
-        
-        .form-control {
-            width: 100%;
-            padding: 12px 16px;
-            border: 2px solid #e9ecef;
-            border-radius: 10px;
-            font-size: 16px;
-            transition: all 0.3s ease;
-            background: white;
-        }
-        
-        .form-control:focus {
-            outline: none;
-            border-color: #dc3545;
-            box-shadow: 0 0 0 3px rgba(220, 53, 69, 0.1);
-        }
-        
-        .btn {
-            background: linear-gradient(135deg, #dc3545 0%, #c82333 100%);
-            color: white;
-            padding: 15px 30px;
-            border: none;
-            border-radius: 12px;
-            cursor: pointer;
-            font-size: 16px;
-            font-weight: 600;
-            transition: all 0.3s ease;
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-        }
-        
-        .btn:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 6px 20px rgba(220, 53, 69, 0.4);
-        }
-        
-        .btn:disabled {
-            background: #6c757d;
-            cursor: not-allowed;
-            transform: none;
-            box-shadow: none;
-        }
-        
-        .status {
-            margin: 25px 0;
-            padding: 20px;
-            border-radius: 12px;
-            display: none;
-            font-weight: 500;
-        }
-        
-        .status.info {
-            background: #d1ecf1;
-            color: #0c5460;
-            border-left: 5px solid #17a2b8;
-        }
-        
-        .status.success {
-            background: #d4edda;
-            color: #155724;
-            border-left: 5px solid #28a745;
-        }
-        
-        .status.error {
-            background: #f8d7da;
-            color: #721c24;
-            border-left: 5px solid #dc3545;
-        }
-        
-        .how-it-works {
-            background: linear-gradient(135deg, #e3f2fd 0%, #bbdefb 100%);
-            padding: 30px;
-            border-radius: 15px;
-            margin-top: 40px;
-            border-left: 5px solid #2196f3;
-        }
-        
-        @media (max-width: 768px) {
-            body { padding: 10px; }
-            .content { padding: 20px; }
-            .form-grid { grid-template-columns: 1fr; }
-        }
-    </style>
+    <link rel="stylesheet" href="/static/app.css?v={{ css_version }}">
 </head>
 <body>
     <div class="container">
@@ -238,8 +103,8 @@ HTML_TEMPLATE = '''
 
             <div class="upload-section">
                 <h3>Upload Spreadsheet</h3>
-                <input type="file" id="fileInput" accept=".csv,.xlsx,.xls" class="form-control" style="margin-bottom: 15px;">
-                <p>Supported formats: CSV, Excel (.xlsx, .xls) - Max 16MB</p>
+                <input type="file" id="fileInput" accept="{{ supported_formats|join(',') }}" class="form-control" style="margin-bottom: 15px;">
+                <p>Supported formats: CSV, Excel ({{ supported_formats[1:]|join(', ') }}) - Max 16MB</p>
             </div>
 
             <div class="settings">
@@ -250,7 +115,7 @@ HTML_TEMPLATE = '''
                         <input type="text" id="urlColumn" class="form-control" value="url" placeholder="url">
                     </div>
                     <div class="form-group">
-                        <label for="delay">Delay Between Requests (seconds):</label>
+                        <label for="delay">Delay Between Requests per Domain (seconds):</label>
                         <input type="number" id="delay" class="form-control" value="0.1" min="0.0" max="1.0" step="0.1">
                         <small style="color: #666; font-size: 12px;">Lower values = faster processing, but may hit rate limits</small>
                     </div>
@@ -269,7 +134,10 @@ HTML_TEMPLATE = '''
             <button id="processBtn" class="btn" onclick="processUrls()">Start Processing URLs</button>
 
             <div id="status" class="status"></div>
-            <button id="downloadBtn" class="btn" onclick="downloadResults()" style="display: none; margin-top: 20px;">Download Results</button>
+            <div id="downloadBtns" style="display: none; margin-top: 20px;">
+                <button class="btn" onclick="downloadResults('csv')">Download CSV</button>
+                <button class="btn" onclick="downloadResults('xlsx')">Download Excel</button>
+            </div>
 
             <div class="how-it-works">
                 <h3>How it works</h3>
@@ -296,137 +164,49 @@ HTML_TEMPLATE = '''
         </div>
     </div>
 
-    <script>
-        let processedData = null;
-
-        function showStatus(message, type = 'info') {
-            const status = document.getElementById('status');
-            status.textContent = message;
-            status.className = `status ${type}`;
-            status.style.display = 'block';
-        }
-
-        function updateProgress(current, total, timeElapsed) {
-            const percent = Math.round((current / total) * 100);
-            const avgTimePerUrl = timeElapsed / current;
-            const estimatedTotalTime = avgTimePerUrl * total;
-            const timeRemaining = Math.max(0, estimatedTotalTime - timeElapsed);
-            
-            const message = `Processing ${current}/${total} URLs (${percent}%) - Est. ${Math.round(timeRemaining)}s remaining`;
-            showStatus(message, 'info');
-        }
-
-        async function processUrls() {
-            const fileInput = document.getElementById('fileInput');
-            const file = fileInput.files[0];
-            
-            if (!file) {
-                showStatus('Please select a file first.', 'error');
-                return;
-            }
-
-            const maxUrls = parseInt(document.getElementById('maxUrls').value);
-            
-            // Warn if batch size is too large
-            if (maxUrls > 30) {
-                if (!confirm(`Processing ${maxUrls} URLs may timeout on Vercel. Recommended batch size is 10-20. Continue anyway?`)) {
-                    return;
-                }
-            }
-
-            // Check file size
-            if (file.size > 16 * 1024 * 1024) {
-                showStatus('File too large. Maximum size is 16MB.', 'error');
-                return;
-            }
-
-            const formData = new FormData();
-            formData.append('file', file);
-            formData.append('url_column', document.getElementById('urlColumn').value);
-            formData.append('delay', document.getElementById('delay').value);
-            formData.append('retries', document.getElementById('retries').value);
-            formData.append('max_urls', document.getElementById('maxUrls').value);
-
-            const processBtn = document.getElementById('processBtn');
-            processBtn.disabled = true;
-            processBtn.textContent = 'Processing...';
-
-            showStatus('Starting URL processing...', 'info');
-
-            try {
-                const response = await fetch('/process', {
-                    method: 'POST',
-                    body: formData
-                });
-
-                if (!response.ok) {
-                    const errorText = await response.text();
-                    throw new Error(`Server error: ${response.status} - ${errorText}`);
-                }
-
-                const result = await response.json();
-                
-                if (result.error) {
-                    showStatus(`Error: ${result.error}`, 'error');
-                    return;
-                }
-
-                processedData = result.data;
-                showStatus(`Processing complete! Processed ${result.total} URLs, ${result.successful} successful.`, 'success');
-                document.getElementById('downloadBtn').style.display = 'inline-block';
-
-            } catch (error) {
-                console.error('Processing error:', error);
-                showStatus(`Error: ${error.message}`, 'error');
-            } finally {
-                processBtn.disabled = false;
-                processBtn.textContent = 'Start Processing URLs';
-            }
-        }
-
-        async function downloadResults() {
-            if (!processedData) {
-                showStatus('No processed data available for download.', 'error');
-                return;
-            }
-
-            try {
-                const response = await fetch('/download', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify({ data: processedData })
-                });
-
-                if (response.ok) {
-                    const blob = await response.blob();
-                    const url = window.URL.createObjectURL(blob);
-                    const a = document.createElement('a');
-                    a.style.display = 'none';
-                    a.href = url;
-                    a.download = `processed_urls_${Date.now()}.xlsx`;
-                    document.body.appendChild(a);
-                    a.click();
-                    window.URL.revokeObjectURL(url);
-                    document.body.removeChild(a);
-                } else {
-                    const errorText = await response.text();
-                    showStatus(`Download error: ${errorText}`, 'error');
-                }
-            } catch (error) {
-                console.error('Download error:', error);
-                showStatus(`Download error: ${error.message}`, 'error');
-            }
-        }
-    </script>
+    <script src="/static/app.js?v={{ js_version }}"></script>
 </body>
 </html>
 '''
 
+def static_version(filename):
+    """Short content hash of a static file, so browsers refetch it when it changes"""
+    try:
+        with open(os.path.join(app.static_folder, filename), 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()[:12]
+    except OSError:
+        return ''
+
+# The page only depends on the import status, so render it once instead of on every request
+INDEX_HTML = app.jinja_env.from_string(HTML_TEMPLATE).render(modules_loaded=modules_loaded,
+                                                             error_message=error_message,
+                                                             supported_formats=(spreadsheet_processor.supported_formats
+                                                                                if modules_loaded else ['.csv', '.xlsx', '.xls']),
+                                                             css_version=static_version('app.css'),
+                                                             js_version=static_version('app.js'))
+INDEX_HTML_GZIP = gzip.compress(INDEX_HTML.encode('utf-8'), 9)
+INDEX_ETAG = hashlib.blake2b(INDEX_HTML.encode('utf-8'), digest_size=8).hexdigest()
+
 @app.route('/')
 def index():
-    return render_template_string(HTML_TEMPLATE, modules_loaded=modules_loaded, error_message=error_message)
+    # Serve the precompressed page to clients that accept gzip
+    use_gzip = bool(request.accept_encodings['gzip'])
+    etag = f'{INDEX_ETAG}-gzip' if use_gzip else INDEX_ETAG
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    elif use_gzip:
+        response = Response(INDEX_HTML_GZIP, mimetype='text/html')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(INDEX_HTML, mimetype='text/html')
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    if modules_loaded:
+        # Let Vercel's edge serve the page without invoking the function. Deploys purge the
+        # edge cache, and the import error page is never cached so a fixed instance shows up.
+        # Browsers revalidate every load, which the ETag turns into an empty 304
+        response.headers['Cache-Control'] = 'public, max-age=0, s-maxage=3600'
+    return response
 
 @app.route('/health')
 def health_check():
@@ -442,6 +222,9 @@ def process_urls():
     if not modules_loaded:
         return jsonify({'error': f'Required modules not loaded properly: {error_message}'}), 500
     
+    # Vercel counts the whole request against its 10 second limit, file parsing included
+    deadline = time.monotonic() + 9
+    
     try:
         # Validate file upload
         if 'file' not in request.files:
@@ -456,7 +239,8 @@ def process_urls():
         max_retries = int(request.form.get('retries', 1))
         max_urls = int(request.form.get('max_urls', 20))  # Reduced default batch size
         
-        # Load the spreadsheet
+        # Load the spreadsheet. The whole file is read, even though only the first max_urls
+        # URLs get processed, so the results and the download keep every row
         df = spreadsheet_processor.load_file(file)
         
         # Validate URL column exists
@@ -466,16 +250,15 @@ def process_urls():
                 'error': f'Column "{url_column}" not found. Available columns: {available_cols}'
             }), 400
         
+        df = spreadsheet_processor.use_string_dtype(df, [url_column])
+        
         # Initialize result columns
-        df['resolved_url'] = ''
-        df['redirect_chain'] = ''
-        df['wayback_url'] = ''
-        df['status'] = ''
-        df['error_message'] = ''
+        df = spreadsheet_processor.add_empty_columns(df, RESULT_COLUMNS)
         
-        # Filter rows with non-empty URLs and limit for Vercel
-        urls_to_process = df[df[url_column].notna() & (df[url_column] != '')].head(max_urls)
-        total_urls = len(urls_to_process)
+        # Pick rows with non-empty URLs. Whatever misses the deadline is reported as skipped,
+        # so there's no need to guess up front how many URLs fit the time budget
+        row_labels, urls = spreadsheet_processor.select_urls(df, url_column, max_urls)
+        total_urls = len(urls)
         
         if total_urls == 0:
             return jsonify({'error': 'No valid URLs found to process'}), 400
@@ -484,103 +267,132 @@ def process_urls():
         success_count = 0
         error_count = 0
         
-        start_time = time.time()
+        # Resolve and archive concurrently, stopping before the 9 second budget is exceeded
+        remaining_time = max(0, deadline - time.monotonic())
         
-        # Process each URL with intelligent timeout protection
-        estimated_time_per_url = 0.5  # Conservative estimate including archiving
-        max_safe_urls = min(max_urls, int(8 / estimated_time_per_url))  # Leave 2 seconds buffer
+        results = [BatchProcessor.make_result() for _ in urls]
         
-        # If we have more URLs than we can safely process, limit them
-        if len(urls_to_process) > max_safe_urls:
-            urls_to_process = urls_to_process.head(max_safe_urls)
-            total_urls = len(urls_to_process)
+        # Pace requests per domain, capped at 0.1s so the batch fits the time budget
+        domain_delay = min(max(delay, 0), 0.1)
         
-        for idx, row in urls_to_process.iterrows():
-            # Dynamic timeout check based on progress
-            elapsed_time = time.time() - start_time
-            estimated_remaining_time = (total_urls - processed_count) * estimated_time_per_url
-            
-            # Stop if we're likely to exceed 9 seconds total
-            if elapsed_time + estimated_remaining_time > 9:
-                # Mark remaining URLs as skipped due to timeout
-                remaining_urls = urls_to_process.iloc[processed_count:]
-                for remaining_idx in remaining_urls.index:
-                    df.at[remaining_idx, 'status'] = 'Skipped'
-                    df.at[remaining_idx, 'error_message'] = 'Skipped to avoid timeout - process in smaller batches'
-                    error_count += 1
-                    processed_count += 1
-                break
-            
-            original_url = str(row[url_column]).strip()
+        for position, result in batch_processor.process_urls(urls, max_retries, delay=domain_delay,
+                                                             timeout=remaining_time):
+            results[position] = result
             
-            try:
-                # Resolve URL with retries
-                resolved_url, redirect_chain = resolve_with_retries(original_url, max_retries)
-                
-                if resolved_url:
-                    # Archive in Wayback Machine
-                    wayback_url = archive_with_retries(resolved_url, max_retries)
-                    
-                    # Update dataframe
-                    df.at[idx, 'resolved_url'] = resolved_url
-                    df.at[idx, 'redirect_chain'] = ' -> '.join(redirect_chain) if redirect_chain else original_url
-                    df.at[idx, 'wayback_url'] = wayback_url if wayback_url else 'Failed to archive'
-                    df.at[idx, 'status'] = 'Success'
-                    df.at[idx, 'error_message'] = ''
-                    
-                    success_count += 1
-                else:
-                    df.at[idx, 'status'] = 'Failed'
-                    df.at[idx, 'error_message'] = 'Unable to resolve URL'
-                    error_count += 1
-                    
-            except Exception as e:
-                df.at[idx, 'status'] = 'Error'
-                df.at[idx, 'error_message'] = str(e)
+            if result['status'] == 'Success':
+                success_count += 1
+            else:
                 error_count += 1
-            
             processed_count += 1
-            
-            # Minimal delay for Vercel - adaptive based on time remaining
-            if processed_count < total_urls and delay > 0:
-                remaining_time = 9 - (time.time() - start_time)
-                remaining_urls_count = total_urls - processed_count
-                max_delay = remaining_time / max(remaining_urls_count, 1) - 0.3  # Reserve time for processing
-                actual_delay = min(delay, max_delay, 0.1)  # Cap at 0.1s
-                if actual_delay > 0:
-                    time.sleep(actual_delay)
         
-        # Convert to JSON-serializable format
-        result_data = df.to_dict('records')
+        # Write all results back with one assignment per column
+        for column in RESULT_COLUMNS:
+            df.loc[row_labels, column] = [result[column] for result in results]
+        
+        df = spreadsheet_processor.downcast_integers(df)
+        
+        # Keep the results server-side so the download doesn't have to post them back
+        token = result_store.save(df)
         
-        return jsonify({
-            'data': result_data,
+        summary = dumps_json({
+            'token': token,
             'processed': processed_count,
             'successful': success_count,
             'failed': error_count,
             'total': total_urls
         })
         
+        # Send rows as {"columns": [...], "data": [[...], ...]}, encoded by pandas (missing values become null)
+        result_data = df.to_json(orient='split', index=False, date_format='iso')
+        
+        return compressed_response(summary[:-1] + ', "data": ' + result_data + '}', 'application/json')
+        
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Processing error: {error_details}")
+        app.logger.exception('Processing error')
         return jsonify({'error': f'Processing failed: {str(e)}'}), 500
 
+def parse_json_body() -> dict:
+    """Decode the JSON request body with the app's JSON provider (orjson when available)"""
+    body = request.get_json(silent=True)
+    return body if isinstance(body, dict) else {}
+
+def dumps_json(obj) -> str:
+    """Encode an object as JSON text with the app's JSON provider (orjson when available)"""
+    return app.json.dumps(obj)
+
+def compressed_response(body: str, mimetype: str) -> Response:
+    """Build a response, gzip-compressed when the client accepts it and the body is large enough to gain"""
+    data = body.encode('utf-8')
+    response = Response(mimetype=mimetype)
+    if request.accept_encodings['gzip'] and len(data) >= 512:
+        # Level 6 compresses nearly as well as 9 in a fraction of the time
+        data = gzip.compress(data, 6)
+        response.headers['Content-Encoding'] = 'gzip'
+    response.set_data(data)
+    response.vary.add('Accept-Encoding')
+    return response
+
 @app.route('/download', methods=['POST'])
 def download_results():
+    if not modules_loaded:
+        return jsonify({'error': f'Required modules not loaded properly: {error_message}'}), 500
+    
     try:
-        data = request.json.get('data', [])
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
-        
-        df = pd.DataFrame(data)
+        body = parse_json_body()
+        token = body.get('token')
+        data = body.get('data', [])
+        
+        df = result_store.load(token) if token else None
+        if df is None:
+            if token and not data:
+                # Stored results expired or live on another instance - let the client send the data
+                return jsonify({'error': 'Results not found'}), 404
+            if not data:
+                return jsonify({'error': 'No data provided'}), 400
+            if isinstance(data, dict):
+                df = pd.DataFrame(data.get('data', []), columns=data.get('columns'))
+            else:
+                df = pd.DataFrame(data)
+        
+        return build_download(df, body.get('format', 'csv'))
         
-        # Create Excel file in memory
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Processed_URLs')
+    except Exception as e:
+        app.logger.exception('Download error')
+        return jsonify({'error': f'Download failed: {str(e)}'}), 500
+
+@app.route('/download/<token>', methods=['GET'])
+def download_stored_results(token):
+    if not modules_loaded:
+        return jsonify({'error': f'Required modules not loaded properly: {error_message}'}), 500
+    
+    try:
+        file_format = 'xlsx' if request.args.get('format') == 'xlsx' else 'csv'
+        
+        # Stored results never change, so the token and format identify the file
+        etag = f'{token}-{file_format}'
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            df = result_store.load(token)
+            if df is None:
+                return jsonify({'error': 'Results not found'}), 404
+            response = build_download(df, file_format)
+        
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, max-age=300'
+        return response
         
+    except Exception as e:
+        app.logger.exception('Download error')
+        return jsonify({'error': f'Download failed: {str(e)}'}), 500
+
+def build_download(df: pd.DataFrame, file_format: str) -> Response:
+    """Build the attachment response for processed results"""
+    if file_format == 'xlsx':
+        # Create Excel file row by row with constant memory, spilling large workbooks to disk.
+        # send_file streams the file in chunks and closes it once the response is sent
+        output = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        spreadsheet_processor.write_excel(df, output)
         output.seek(0)
         
         return send_file(
@@ -589,39 +401,13 @@ def download_results():
             as_attachment=True,
             download_name=f'processed_urls_{int(time.time())}.xlsx'
         )
-        
-    except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Download error: {error_details}")
-        return jsonify({'error': f'Download failed: {str(e)}'}), 500
-
-def resolve_with_retries(url, max_retries):
-    """Resolve URL with retry mechanism"""
-    for attempt in range(max_retries + 1):
-        try:
-            return url_resolver.resolve_url(url)
-        except Exception as e:
-            if attempt == max_retries:
-                raise e
-            time.sleep(0.1)  # Very short delay for Vercel
-    return None, []
-
-def archive_with_retries(url, max_retries):
-    """Archive URL with retry mechanism - optimized for Vercel"""
-    for attempt in range(max_retries + 1):
-        try:
-            result = wayback_archiver.archive_url(url)
-            # Don't retry if we got a message response (like "Rate limited")
-            if result and not result.startswith(('Failed', 'Error', 'Timeout')):
-                return result
-            elif attempt == max_retries:
-                return result or 'Failed to archive after retries'
-        except Exception as e:
-            if attempt == max_retries:
-                return f'Archive error: {str(e)[:30]}...'
-            time.sleep(0.1)  # Very short delay for Vercel
-    return 'Failed to archive'
+    
+    # Stream CSV so the first bytes go out before the whole file is built
+    return Response(
+        spreadsheet_processor.iter_csv(df),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename=processed_urls_{int(time.time())}.csv'}
+    )
 
 # Vercel entry point
 app = app
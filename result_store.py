@@ -0,0 +1,99 @@
+import os
+import re
+import tempfile
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import pandas as pd
+
+TOKEN_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+class ResultStore:
+    """Keeps processed DataFrames in memory and on local disk so downloads can fetch them by token"""
+
+    def __init__(self, directory: Optional[str] = None, ttl: int = 3600, memory_entries: int = 32):
+        """
+        Initialize result store
+
+        Args:
+            directory: Directory for stored results (defaults to the system temp directory, writable on Vercel)
+            ttl: Seconds a stored result stays available
+            memory_entries: Most recent results also kept in memory, skipping the disk read
+        """
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'processed_results')
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, df: pd.DataFrame) -> str:
+        """
+        Store a processed DataFrame
+
+        Args:
+            df: DataFrame to store
+
+        Returns:
+            Token to load the DataFrame with
+        """
+        token = uuid.uuid4().hex
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self.purge_expired()
+            df.to_pickle(self._path(token))
+        except OSError as e:
+            # The in-memory copy still serves downloads from this instance
+            print(f"Could not store results on disk: {e}")
+
+        with self._lock:
+            self._memory[token] = (time.time(), df)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+        return token
+
+    def load(self, token: str) -> Optional[pd.DataFrame]:
+        """
+        Load a stored DataFrame
+
+        Args:
+            token: Token returned by save
+
+        Returns:
+            The stored DataFrame, or None if the token is unknown or expired
+        """
+        # Tokens become file names, so only accept the exact format save produces
+        if not token or not TOKEN_PATTERN.match(token):
+            return None
+
+        with self._lock:
+            entry = self._memory.get(token)
+            if entry and time.time() - entry[0] <= self.ttl:
+                self._memory.move_to_end(token)
+                return entry[1]
+
+        path = self._path(token)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            return pd.read_pickle(path)
+        except (OSError, ValueError):
+            return None
+
+    def purge_expired(self):
+        """Delete stored results older than the TTL"""
+        cutoff = time.time() - self.ttl
+
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.pkl') and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+        except OSError:
+            pass
+
+    def _path(self, token: str) -> str:
+        return os.path.join(self.directory, f'{token}.pkl')
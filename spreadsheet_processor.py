@@ -1,17 +1,63 @@
 
 import pandas as pd
+import numpy as np
 import io
-from typing import Union, Optional
-import openpyxl
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
+import re
+import codecs
+import hashlib
+import threading
+import zipfile
+from collections import OrderedDict
+from typing import Iterator, List, Tuple, Optional
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    # pyarrow is optional (it would push the Vercel bundle over its size limit)
+    STRING_DTYPE = None
+
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = 'calamine'
+except ImportError:
+    # Rust-based reader, much faster than openpyxl and xlrd when installed
+    EXCEL_ENGINE = None
+
+# Bytes of a CSV file decoded at a time while checking for UTF-8
+ENCODING_CHECK_BYTES = 1024 * 1024
+
+# Largest upload whose parsed DataFrame is kept for repeat uploads of the same file
+PARSE_CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+# Common URL column names
+URL_COLUMN_NAMES = (
+    'url', 'link', 'website', 'web', 'href', 'uri', 'address',
+    'shortened_url', 'short_url', 'shorturl', 'link_url'
+)
+URL_COLUMN_NAME_SET = frozenset(URL_COLUMN_NAMES)
+
+# Substrings that make a cell value look like a URL
+URL_VALUE_PATTERN = re.compile(r'http|www\.|\.com|\.org|\.net|bit\.ly|tinyurl', re.IGNORECASE)
 
 class SpreadsheetProcessor:
     """Handles loading and processing of spreadsheet files"""
     
-    def __init__(self):
-        """Initialize the spreadsheet processor"""
+    def __init__(self, parse_cache_entries: int = 8):
+        """
+        Initialize the spreadsheet processor
+        
+        Args:
+            parse_cache_entries: Most recently parsed uploads kept in memory, so the same
+                file uploaded again (like on a Streamlit rerun) isn't parsed twice
+        """
+        self.parse_cache_entries = parse_cache_entries
+        self._parse_cache = OrderedDict()
+        self._lock = threading.Lock()
         self.supported_formats = ['.csv', '.xlsx', '.xls']
+        if EXCEL_ENGINE:
+            # Binary workbooks only have a reader through calamine
+            self.supported_formats.append('.xlsb')
     
     def load_file(self, uploaded_file) -> pd.DataFrame:
         """
@@ -42,49 +88,197 @@ class SpreadsheetProcessor:
             if hasattr(uploaded_file, 'seek'):
                 uploaded_file.seek(0)
             
-            # Read file content into BytesIO for consistent handling
-            if hasattr(uploaded_file, 'read'):
-                file_content = uploaded_file.read()
-            else:
+            # Read the whole file content for parsing and hashing. In-memory uploads
+            # (Streamlit) hand over their bytes without a copy, so a large file isn't held
+            # twice while it is parsed. Flask spools uploads to a file, which is read once
+            if hasattr(uploaded_file, 'getvalue'):
                 file_content = uploaded_file.getvalue()
+            else:
+                file_content = uploaded_file.read()
             
-            file_buffer = io.BytesIO(file_content)
+            key = None
+            if len(file_content) <= PARSE_CACHE_MAX_BYTES and self.parse_cache_entries > 0:
+                key = (hashlib.blake2b(file_content, digest_size=16).digest(), file_extension)
+                with self._lock:
+                    df = self._parse_cache.get(key)
+                    if df is not None:
+                        self._parse_cache.move_to_end(key)
+                if df is not None:
+                    # Callers add result columns and fill in cells, so never hand out the cached frame
+                    return df.copy()
             
-            if file_extension == '.csv':
-                # Try different encodings for CSV files
-                encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-                
-                for encoding in encodings:
-                    try:
-                        file_buffer.seek(0)
-                        df = pd.read_csv(file_buffer, encoding=encoding)
-                        return self.clean_dataframe(df)
-                    except (UnicodeDecodeError, UnicodeError):
-                        continue
-                
-                # If all encodings fail, try with error handling
+            df = self.parse_content(file_content, file_extension)
+            
+            if key is not None:
+                with self._lock:
+                    self._parse_cache[key] = df.copy()
+                    while len(self._parse_cache) > self.parse_cache_entries:
+                        self._parse_cache.popitem(last=False)
+            return df
+            
+        except Exception as e:
+            raise Exception(f"Error loading file: {str(e)}")
+    
+    def parse_content(self, file_content: bytes, file_extension: str) -> pd.DataFrame:
+        """
+        Parse the bytes of an uploaded spreadsheet into a cleaned DataFrame
+        
+        Args:
+            file_content: Raw file content
+            file_extension: Lowercased extension, one of supported_formats
+            
+        Returns:
+            pandas DataFrame containing the spreadsheet data
+        """
+        file_buffer = io.BytesIO(file_content)
+        
+        if file_extension == '.csv':
+            # Try the detected encoding first, so the file is normally parsed once. UTF-8 is
+            # never a fallback: detection already checked it, and the Arrow parser doesn't
+            # reject invalid UTF-8 but returns the affected values as bytes
+            encodings = [self.detect_encoding(file_content)]
+            encodings += [e for e in ['latin-1', 'cp1252', 'iso-8859-1'] if e != encodings[0]]
+            
+            for encoding in encodings:
+                try:
+                    file_buffer.seek(0)
+                    df = self.read_csv(file_buffer, encoding=encoding)
+                    return self.clean_dataframe(df)
+                except (UnicodeDecodeError, UnicodeError):
+                    continue
+            
+            # If all encodings fail, try with error handling
+            file_buffer.seek(0)
+            df = self.read_csv(file_buffer, encoding='utf-8', encoding_errors='replace')
+            return self.clean_dataframe(df)
+            
+        elif file_extension in ['.xlsx', '.xls', '.xlsb']:
+            # Handle Excel files
+            try:
+                # Without calamine, route by content: .xlsx workbooks are zip archives, which
+                # is_zipfile confirms from the central directory alone. That way a renamed
+                # legacy .xls isn't fully parsed by openpyxl only to fail
+                engine = EXCEL_ENGINE or ('openpyxl' if zipfile.is_zipfile(file_buffer) else 'xlrd')
                 file_buffer.seek(0)
-                df = pd.read_csv(file_buffer, encoding='utf-8', errors='replace')
+                df = pd.read_excel(file_buffer, engine=engine)
                 return self.clean_dataframe(df)
-                
-            elif file_extension in ['.xlsx', '.xls']:
-                # Handle Excel files
+            except Exception as e:
+                # Try with different engine if the first one fails
                 try:
                     file_buffer.seek(0)
-                    engine = 'openpyxl' if file_extension == '.xlsx' else 'xlrd'
-                    df = pd.read_excel(file_buffer, engine=engine)
+                    df = pd.read_excel(file_buffer)  # Let pandas choose engine
                     return self.clean_dataframe(df)
-                except Exception as e:
-                    # Try with different engine if the first one fails
-                    try:
-                        file_buffer.seek(0)
-                        df = pd.read_excel(file_buffer)  # Let pandas choose engine
-                        return self.clean_dataframe(df)
-                    except Exception as e2:
-                        raise Exception(f"Failed to read Excel file: {str(e)} / {str(e2)}")
+                except Exception as e2:
+                    raise Exception(f"Failed to read Excel file: {str(e)} / {str(e2)}")
+    
+    def detect_encoding(self, content: bytes) -> str:
+        """
+        Guess the encoding of a CSV file from a byte order mark or by validating it as UTF-8
+        
+        Validation runs in C one block at a time, much faster than parsing the file
+        with an encoding that fails near the end.
+        
+        Args:
+            content: Raw file content
             
-        except Exception as e:
-            raise Exception(f"Error loading file: {str(e)}")
+        Returns:
+            Encoding name for pd.read_csv
+        """
+        if content.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        if content.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return 'utf-16'
+        
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        view = memoryview(content)
+        try:
+            # The decoder carries multi-byte characters split across blocks over to the next one
+            for start in range(0, len(view), ENCODING_CHECK_BYTES):
+                decoder.decode(view[start:start + ENCODING_CHECK_BYTES])
+            decoder.decode(b'', final=True)
+            return 'utf-8'
+        except UnicodeDecodeError:
+            pass
+        
+        # Spreadsheet programs on Windows export CSV as cp1252 unless told otherwise. Statistical
+        # detectors are unreliable on short, mostly ASCII files like these
+        return 'cp1252'
+    
+    def read_csv(self, file_buffer, **kwargs) -> pd.DataFrame:
+        """
+        Read a CSV file, with Arrow's multithreaded parser when pyarrow is installed
+        
+        Args:
+            file_buffer: File-like object positioned at the start of the CSV
+            **kwargs: Extra arguments for pd.read_csv
+            
+        Returns:
+            DataFrame with every row of the file
+        """
+        if STRING_DTYPE:
+            try:
+                df = pd.read_csv(file_buffer, engine='pyarrow', **kwargs)
+                if self.matches_default_parser(df):
+                    return df
+            except ValueError:
+                # Options or input the Arrow parser can't handle - use the default parser
+                pass
+            file_buffer.seek(0)
+        return pd.read_csv(file_buffer, **kwargs)
+    
+    def matches_default_parser(self, df: pd.DataFrame) -> bool:
+        """
+        Check that a CSV read by the Arrow parser matches what the default parser returns
+        
+        Unlike the default parser, Arrow keeps repeated headers as they are instead of
+        renaming them (a, a.1) and turns date and time text into timestamps, so such
+        files are read again with the default parser.
+        
+        Args:
+            df: DataFrame read with engine='pyarrow'
+            
+        Returns:
+            True if the DataFrame can be used as it is
+        """
+        if df.columns.has_duplicates:
+            return False
+        
+        for i, dtype in enumerate(df.dtypes):
+            if dtype.kind == 'M':
+                return False
+            if dtype == object and pd.api.types.infer_dtype(df.iloc[:, i], skipna=True) in ('date', 'time', 'datetime'):
+                return False
+        
+        return True
+    
+    def clean_urls(self, series: pd.Series) -> pd.Series:
+        """
+        Convert a URL column to stripped strings in one vectorized pass
+        
+        Args:
+            series: URL column
+            
+        Returns:
+            String series, missing values left as NA
+        """
+        return series.astype(STRING_DTYPE or 'string').str.strip()
+    
+    def select_urls(self, df: pd.DataFrame, url_column: str,
+                    limit: Optional[int] = None) -> Tuple[np.ndarray, List[str]]:
+        """
+        Pick the rows to process without copying the rest of the DataFrame
+        
+        Args:
+            df: DataFrame containing the URL column
+            url_column: Name of the URL column
+            limit: Maximum number of URLs to return
+            
+        Returns:
+            Tuple of (row labels, stripped URL strings) for the first non-empty URLs
+        """
+        urls = self.clean_urls(df[url_column]).to_numpy(dtype=object, na_value='')
+        positions = np.flatnonzero(urls != '')[:limit]
+        return df.index.to_numpy()[positions], urls[positions].tolist()
     
     def clean_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -96,20 +290,89 @@ class SpreadsheetProcessor:
         Returns:
             Cleaned DataFrame
         """
-        # Remove completely empty rows
-        df = df.dropna(how='all')
-        
-        # Remove completely empty columns
-        df = df.dropna(axis=1, how='all')
+        # Remove completely empty rows and columns, both from one missing-value mask and with a single copy.
+        # Exported files rarely have any, so skip the copy when nothing would be dropped
+        present = df.notna().to_numpy()
+        rows, columns = present.any(axis=1), present.any(axis=0)
+        if not (rows.all() and columns.all()):
+            df = df.iloc[rows, columns]
         
         # Clean column names - remove extra whitespace and make consistent
-        df.columns = df.columns.astype(str).str.strip()
+        column_names = df.columns.astype(str).str.strip()
+        if not column_names.equals(df.columns):
+            df.columns = column_names
         
         # Reset index
-        df = df.reset_index(drop=True)
+        if not df.index.equals(pd.RangeIndex(len(df))):
+            df = df.reset_index(drop=True)
+        
+        # Store purely textual columns as Arrow strings. Mixed columns (like numbers and text
+        # from Excel) stay object so their numbers are still exported as numbers. Columns are
+        # taken by position, since repeated headers make a label lookup return a DataFrame
+        if STRING_DTYPE:
+            for i, dtype in enumerate(df.dtypes):
+                column = df.iloc[:, i]
+                if dtype == object and pd.api.types.infer_dtype(column, skipna=True) == 'string':
+                    df.isetitem(i, column.astype(STRING_DTYPE))
         
         return df
     
+    def add_empty_columns(self, df: pd.DataFrame, columns: list) -> pd.DataFrame:
+        """
+        Add empty text columns to the DataFrame in a single concat
+        
+        Adding the columns one at a time makes pandas rebuild its internal blocks
+        on every assignment. Existing columns with the same names are replaced.
+        
+        Args:
+            df: Input DataFrame
+            columns: Names of the columns to add
+            
+        Returns:
+            DataFrame with the new columns appended, filled with empty strings
+        """
+        extras = pd.DataFrame('', index=df.index, columns=columns, dtype=STRING_DTYPE or object)
+        df = df.drop(columns=[column for column in columns if column in df.columns])
+        return pd.concat([df, extras], axis=1)
+    
+    def downcast_integers(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Store integer columns in the smallest integer type that holds their values
+        
+        Float columns are left alone, since float32 would change the values written
+        to the exported files.
+        
+        Args:
+            df: DataFrame to convert in place
+            
+        Returns:
+            The same DataFrame
+        """
+        # Columns are taken by position, since repeated headers make a label lookup return a DataFrame
+        for i, dtype in enumerate(df.dtypes):
+            if pd.api.types.is_integer_dtype(dtype):
+                df.isetitem(i, pd.to_numeric(df.iloc[:, i], downcast='integer'))
+        return df
+    
+    def use_string_dtype(self, df: pd.DataFrame, columns: list) -> pd.DataFrame:
+        """
+        Store text columns as Arrow-backed strings when pyarrow is available
+        
+        Arrow strings take a fraction of the memory of Python string objects and
+        make vectorized comparisons like notna() much faster.
+        
+        Args:
+            df: DataFrame to convert in place
+            columns: Names of the columns to convert
+            
+        Returns:
+            The same DataFrame, unchanged if pyarrow is not installed
+        """
+        if STRING_DTYPE:
+            for column in columns:
+                df[column] = df[column].astype(STRING_DTYPE)
+        return df
+    
     def get_file_extension(self, filename: str) -> str:
         """
         Get file extension from filename
@@ -123,9 +386,8 @@ class SpreadsheetProcessor:
         if not filename or '.' not in filename:
             return ''
         
-        # Handle cases where filename might have multiple dots
-        extension = '.' + filename.split('.')[-1].lower()
-        return extension
+        # Only the text after the last dot counts when the filename has several
+        return '.' + filename.rpartition('.')[2].lower()
     
     def validate_columns(self, df: pd.DataFrame, required_columns: list) -> dict:
         """
@@ -161,37 +423,26 @@ class SpreadsheetProcessor:
         Returns:
             Suggested column name or None
         """
-        # Common URL column names
-        url_column_patterns = [
-            'url', 'link', 'website', 'web', 'href', 'uri', 'address',
-            'shortened_url', 'short_url', 'shorturl', 'link_url'
-        ]
+        names = [str(col).lower().strip() for col in df.columns]
         
         # Check for exact matches first
-        for col in df.columns:
-            if col.lower().strip() in url_column_patterns:
+        for col, name in zip(df.columns, names):
+            if name in URL_COLUMN_NAME_SET:
                 return col
         
         # Check for partial matches
-        for col in df.columns:
-            col_lower = col.lower().strip()
-            for pattern in url_column_patterns:
-                if pattern in col_lower or col_lower in pattern:
-                    return col
+        for col, name in zip(df.columns, names):
+            if any(pattern in name or name in pattern for pattern in URL_COLUMN_NAMES):
+                return col
         
         # Check column content for URL-like patterns
         for col in df.columns:
-            if df[col].dtype == 'object':  # String columns only
-                sample_values = df[col].dropna().head(10).astype(str)
-                url_count = 0
-                
-                for value in sample_values:
-                    value_lower = value.lower().strip()
-                    if any(pattern in value_lower for pattern in ['http', 'www.', '.com', '.org', '.net', 'bit.ly', 'tinyurl']):
-                        url_count += 1
+            series = df[col]
+            if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):  # String columns only
+                sample_values = series.dropna().head(10).astype(str)
                 
                 # If more than 50% of sample values look like URLs
-                if len(sample_values) > 0 and (url_count / len(sample_values)) > 0.5:
+                if len(sample_values) > 0 and sample_values.str.contains(URL_VALUE_PATTERN).mean() > 0.5:
                     return col
         
         return None
@@ -207,94 +458,180 @@ class SpreadsheetProcessor:
         Returns:
             Excel file as bytes
         """
-        output = io.BytesIO()
+        return self.export_to_excel_streaming(df, sheet_name='Processed URLs', formatted=True)
+    
+    def export_to_excel_streaming(self, df: pd.DataFrame, sheet_name: str = 'Processed_URLs',
+                                  formatted: bool = False) -> bytes:
+        """
+        Export DataFrame to Excel without building the workbook in memory
         
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Processed URLs')
-            
-            # Get the workbook and worksheet
-            workbook = writer.book
-            worksheet = writer.sheets['Processed URLs']
-            
-            # Apply formatting
-            self.format_excel_worksheet(worksheet, df)
+        Rows are written one at a time with xlsxwriter's constant_memory mode, which
+        flushes each row to disk as soon as the next one starts. pandas' own
+        ExcelWriter writes column by column, which constant_memory cannot handle,
+        so the rows are emitted here directly.
         
-        output.seek(0)
+        Args:
+            df: DataFrame to export
+            sheet_name: Name of the worksheet
+            formatted: Style the header, size the columns and color the status column
+            
+        Returns:
+            Excel file as bytes
+        """
+        output = io.BytesIO()
+        self.write_excel(df, output, sheet_name=sheet_name, formatted=formatted)
         return output.getvalue()
     
-    def format_excel_worksheet(self, worksheet, df: pd.DataFrame):
+    def write_excel(self, df: pd.DataFrame, output, sheet_name: str = 'Processed_URLs',
+                    formatted: bool = False):
         """
-        Apply formatting to Excel worksheet
+        Write DataFrame as an Excel workbook to a binary file object
         
         Args:
-            worksheet: openpyxl worksheet object
-            df: DataFrame being exported
+            df: DataFrame to export
+            output: Seekable binary file object, e.g. a spooled temporary file
+            sheet_name: Name of the worksheet
+            formatted: Style the header, size the columns and color the status column
+        """
+        # Imported here so cold starts that only resolve URLs don't pay for it
+        import xlsxwriter
+        
+        workbook = xlsxwriter.Workbook(output, {
+            'constant_memory': True,
+            'strings_to_urls': False,  # Skip hyperlink detection on every URL cell
+            'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+            'remove_timezone': True
+        })
+        worksheet = workbook.add_worksheet(sheet_name)
+        
+        # Missing values become blank cells, as with DataFrame.to_excel
+        values = df.astype(object).where(df.notna(), None)
+        
+        # xlsxwriter can't store infinite numbers, so write them as text like to_excel's inf_rep
+        infinite = values.isin([np.inf, -np.inf]).to_numpy()
+        if infinite.any():
+            values = values.mask(infinite, values.astype(str))
+        
+        if formatted:
+            header_format = workbook.add_format({
+                'bold': True, 'font_color': '#FFFFFF', 'bg_color': '#366092',
+                'align': 'center', 'valign': 'vcenter'
+            })
+            self.format_excel_worksheet(workbook, worksheet, df, values)
+        else:
+            header_format = workbook.add_format({'bold': True})
+        
+        worksheet.write_row(0, 0, [str(col) for col in df.columns], header_format)
+        
+        for row_num, row in enumerate(values.itertuples(index=False, name=None), 1):
+            worksheet.write_row(row_num, 0, row)
+        
+        workbook.close()
+    
+    def format_excel_worksheet(self, workbook, worksheet, df: pd.DataFrame, values: pd.DataFrame):
         """
-        # Header formatting
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_alignment = Alignment(horizontal="center", vertical="center")
+        Apply formatting to Excel worksheet
         
-        # Format header row
-        for col_num, column_title in enumerate(df.columns, 1):
-            cell = worksheet.cell(row=1, column=col_num)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
+        Must be called before any rows are written, since constant_memory mode
+        writes column settings ahead of the row data.
         
+        Args:
+            workbook: xlsxwriter workbook object
+            worksheet: xlsxwriter worksheet object
+            df: DataFrame being exported
+            values: DataFrame values as written, with missing values as None
+        """
         # Auto-adjust column widths
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
+        for col_num, column_title in enumerate(df.columns):
+            column = values.iloc[:, col_num]
+            lengths = column.astype(str).where(column.notna(), '').str.len()
+            max_length = max(len(str(column_title)), int(lengths.max()) if len(lengths) else 0)
             
             # Set column width with some padding, but not too wide
-            adjusted_width = min(max_length + 2, 50)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
+            worksheet.set_column(col_num, col_num, min(max_length + 2, 50))
         
         # Add conditional formatting for status column
-        if 'status' in df.columns:
-            status_col_index = df.columns.get_loc('status') + 1
+        if 'status' in df.columns and len(df):
+            status_col_index = df.columns.get_loc('status')
+            
+            # Success cells green, submitted archives amber, failures red
+            success_fill = workbook.add_format({'bg_color': '#C6EFCE'})
+            error_fill = workbook.add_format({'bg_color': '#FFC7CE'})
+            pending_fill = workbook.add_format({'bg_color': '#FFEB9C'})
+            
+            for value, fill in (('Success', success_fill), ('Archive submitted', pending_fill),
+                                ('Failed', error_fill), ('Error', error_fill)):
+                worksheet.conditional_format(1, status_col_index, len(df), status_col_index, {
+                    'type': 'cell', 'criteria': '==', 'value': f'"{value}"', 'format': fill
+                })
+    
+    def export_to_csv(self, df: pd.DataFrame) -> bytes:
+        """
+        Export DataFrame to CSV format
+        
+        Args:
+            df: DataFrame to export
             
-            # Success cells - green background
-            success_fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-            error_fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
+        Returns:
+            UTF-8 encoded CSV file as bytes
+        """
+        return df.to_csv(index=False).encode('utf-8')
+    
+    def iter_csv(self, df: pd.DataFrame, chunk_rows: int = 1000) -> Iterator[bytes]:
+        """
+        Export DataFrame to CSV format in chunks
+        
+        Args:
+            df: DataFrame to export
+            chunk_rows: Number of rows encoded per chunk
             
-            for row_num in range(2, len(df) + 2):  # Skip header row
-                cell = worksheet.cell(row=row_num, column=status_col_index)
-                if cell.value == 'Success':
-                    cell.fill = success_fill
-                elif cell.value in ['Failed', 'Error']:
-                    cell.fill = error_fill
+        Yields:
+            UTF-8 encoded CSV chunks, the first one including the header
+        """
+        if df.empty:
+            yield df.to_csv(index=False).encode('utf-8')
+            return
+        
+        for start in range(0, len(df), chunk_rows):
+            chunk = df.iloc[start:start + chunk_rows]
+            yield chunk.to_csv(index=False, header=(start == 0)).encode('utf-8')
     
-    def get_dataframe_info(self, df: pd.DataFrame) -> dict:
+    def get_dataframe_info(self, df: pd.DataFrame, suggest_column: bool = True) -> dict:
         """
         Get comprehensive information about the DataFrame
         
         Args:
             df: DataFrame to analyze
+            suggest_column: Include suggested_url_column, which samples the column values
             
         Returns:
             Dictionary with DataFrame information
         """
+        data_types = {}
+        missing_values = {}
+        numeric_columns = []
+        memory_usage = 0
+        
+        # Collect every per-column statistic in one pass over the columns
+        for name, column in df.items():
+            data_types[name] = column.dtype
+            missing_values[name] = int(column.isna().sum())
+            memory_usage += column.memory_usage(index=False, deep=True)
+            if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+                numeric_columns.append(name)
+        
         info = {
             'total_rows': len(df),
             'total_columns': len(df.columns),
             'column_names': df.columns.tolist(),
-            'memory_usage': df.memory_usage(deep=True).sum(),
-            'data_types': df.dtypes.to_dict(),
-            'missing_values': df.isnull().sum().to_dict(),
-            'suggested_url_column': self.suggest_url_column(df)
+            'memory_usage': memory_usage + df.index.memory_usage(deep=True),
+            'data_types': data_types,
+            'missing_values': missing_values
         }
+        if suggest_column:
+            info['suggested_url_column'] = self.suggest_url_column(df)
         
         # Add column statistics for numeric columns
-        numeric_columns = df.select_dtypes(include=['number']).columns
         if len(numeric_columns) > 0:
             info['numeric_summary'] = df[numeric_columns].describe().to_dict()
         
@@ -0,0 +1,132 @@
+let processedData = null;
+let processedToken = null;
+
+function showStatus(message, type = 'info') {
+    const status = document.getElementById('status');
+    status.textContent = message;
+    status.className = `status ${type}`;
+    status.style.display = 'block';
+}
+
+function updateProgress(current, total, timeElapsed) {
+    const percent = Math.round((current / total) * 100);
+    const avgTimePerUrl = timeElapsed / current;
+    const estimatedTotalTime = avgTimePerUrl * total;
+    const timeRemaining = Math.max(0, estimatedTotalTime - timeElapsed);
+
+    const message = `Processing ${current}/${total} URLs (${percent}%) - Est. ${Math.round(timeRemaining)}s remaining`;
+    showStatus(message, 'info');
+}
+
+async function processUrls() {
+    const fileInput = document.getElementById('fileInput');
+    const file = fileInput.files[0];
+
+    if (!file) {
+        showStatus('Please select a file first.', 'error');
+        return;
+    }
+
+    const maxUrls = parseInt(document.getElementById('maxUrls').value);
+
+    // Warn if batch size is too large
+    if (maxUrls > 30) {
+        if (!confirm(`Processing ${maxUrls} URLs may timeout on Vercel. Recommended batch size is 10-20. Continue anyway?`)) {
+            return;
+        }
+    }
+
+    // Check file size
+    if (file.size > 16 * 1024 * 1024) {
+        showStatus('File too large. Maximum size is 16MB.', 'error');
+        return;
+    }
+
+    const formData = new FormData();
+    formData.append('file', file);
+    formData.append('url_column', document.getElementById('urlColumn').value);
+    formData.append('delay', document.getElementById('delay').value);
+    formData.append('retries', document.getElementById('retries').value);
+    formData.append('max_urls', document.getElementById('maxUrls').value);
+
+    const processBtn = document.getElementById('processBtn');
+    processBtn.disabled = true;
+    processBtn.textContent = 'Processing...';
+
+    showStatus('Starting URL processing...', 'info');
+
+    try {
+        const response = await fetch('/process', {
+            method: 'POST',
+            body: formData
+        });
+
+        if (!response.ok) {
+            const errorText = await response.text();
+            throw new Error(`Server error: ${response.status} - ${errorText}`);
+        }
+
+        const result = await response.json();
+
+        if (result.error) {
+            showStatus(`Error: ${result.error}`, 'error');
+            return;
+        }
+
+        processedData = result.data;
+        processedToken = result.token;
+        showStatus(`Processing complete! Processed ${result.total} URLs, ${result.successful} successful.`, 'success');
+        document.getElementById('downloadBtns').style.display = 'block';
+
+    } catch (error) {
+        console.error('Processing error:', error);
+        showStatus(`Error: ${error.message}`, 'error');
+    } finally {
+        processBtn.disabled = false;
+        processBtn.textContent = 'Start Processing URLs';
+    }
+}
+
+async function downloadResults(format) {
+    if (!processedData) {
+        showStatus('No processed data available for download.', 'error');
+        return;
+    }
+
+    try {
+        const request = (body) => fetch('/download', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(body)
+        });
+
+        // Download the results stored on the server (cacheable GET), only sending them back if they are gone
+        let response = processedToken
+            ? await fetch(`/download/${processedToken}?format=${encodeURIComponent(format)}`)
+            : null;
+        if (!response || response.status === 404) {
+            response = await request({ data: processedData, format: format });
+        }
+
+        if (response.ok) {
+            const blob = await response.blob();
+            const url = window.URL.createObjectURL(blob);
+            const a = document.createElement('a');
+            a.style.display = 'none';
+            a.href = url;
+            a.download = `processed_urls_${Date.now()}.${format}`;
+            document.body.appendChild(a);
+            a.click();
+            window.URL.revokeObjectURL(url);
+            document.body.removeChild(a);
+        } else {
+            const errorText = await response.text();
+            showStatus(`Download error: ${errorText}`, 'error');
+        }
+    } catch (error) {
+        console.error('Download error:', error);
+        showStatus(`Download error: ${error.message}`, 'error');
+    }
+}
@@ -0,0 +1,34 @@
+import io
+import unittest
+
+from spreadsheet_processor import SpreadsheetProcessor
+
+
+class UploadedFile(io.BytesIO):
+    """In-memory upload with a file name, like a Streamlit UploadedFile"""
+
+    def __init__(self, content: bytes, name: str):
+        super().__init__(content)
+        self.name = name
+
+
+class RepeatedHeaderTest(unittest.TestCase):
+    """Headers that repeat once clean_dataframe strips their whitespace"""
+
+    def setUp(self):
+        self.processor = SpreadsheetProcessor()
+        self.df = self.processor.load_file(UploadedFile(b'url,n,n \nbit.ly/a,1,2\nbit.ly/b,3,4\n', 'urls.csv'))
+
+    def test_load_file_keeps_repeated_columns(self):
+        self.assertEqual(len(self.df.columns), 3)
+        self.assertEqual(self.df.columns[0], 'url')
+
+    def test_downcast_integers(self):
+        df = self.processor.downcast_integers(self.df)
+        self.assertEqual([str(dtype) for dtype in df.dtypes.iloc[1:]], ['int8', 'int8'])
+        self.assertEqual(df.iloc[:, 1].tolist(), [1, 3])
+        self.assertEqual(df.iloc[:, 2].tolist(), [2, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple, List, Optional
+
+# Writes between two prune() runs
+PRUNE_INTERVAL = 1000
+
+class URLCache:
+    """Persistent SQLite cache for resolved URLs and Wayback Machine links"""
+
+    def __init__(self, path: Optional[str] = None, resolve_ttl: int = 7 * 86400,
+                 archive_ttl: int = 30 * 86400, memory_entries: int = 4096, max_rows: int = 100000):
+        """
+        Initialize URL cache
+
+        Args:
+            path: SQLite database file (defaults to the system temp directory, writable on Vercel)
+            resolve_ttl: Seconds a resolved redirect chain stays valid
+            archive_ttl: Seconds a Wayback Machine link stays valid
+            memory_entries: Most recently used entries also kept in memory, skipping SQLite
+            max_rows: Most entries kept in SQLite - those closest to expiring are dropped first
+        """
+        self.path = path or os.path.join(tempfile.gettempdir(), 'url_cache.sqlite3')
+        self.resolve_ttl = resolve_ttl
+        self.archive_ttl = archive_ttl
+        self.memory_entries = memory_entries
+        self.max_rows = max_rows
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        try:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'kind TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, '
+                'expires_at REAL NOT NULL, PRIMARY KEY (kind, key))'
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            # Caching is an optimization - keep working without it
+            print(f"URL cache disabled: {e}")
+            self._conn = None
+
+        self.prune()
+
+    def get_resolution(self, url: str) -> Optional[Tuple[str, List[str]]]:
+        """
+        Look up a cached resolution
+
+        Args:
+            url: The original URL
+
+        Returns:
+            Tuple of (final_url, redirect_chain), or None if not cached
+        """
+        value = self._get('resolve', url)
+        if value is None:
+            return None
+        return value[0], value[1]
+
+    def set_resolution(self, url: str, final_url: str, redirect_chain: List[str]):
+        """
+        Cache a resolution
+
+        Args:
+            url: The original URL
+            final_url: The final destination URL
+            redirect_chain: List of URLs in the redirect chain
+        """
+        self._set('resolve', url, [final_url, redirect_chain], self.resolve_ttl)
+
+    def get_archive(self, url: str) -> Optional[str]:
+        """
+        Look up a cached Wayback Machine link
+
+        Args:
+            url: The archived URL
+
+        Returns:
+            Wayback Machine URL, or None if not cached
+        """
+        return self._get('archive', url)
+
+    def set_archive(self, url: str, wayback_url: str):
+        """
+        Cache a Wayback Machine link
+
+        Args:
+            url: The archived URL
+            wayback_url: Wayback Machine URL of the archived page
+        """
+        self._set('archive', url, wayback_url, self.archive_ttl)
+
+    def prune(self):
+        """
+        Delete expired entries from SQLite and trim it down to max_rows
+
+        Runs when the cache is opened and again every PRUNE_INTERVAL writes.
+        """
+        if self._conn is None:
+            return
+
+        try:
+            with self._lock:
+                self._conn.execute('DELETE FROM cache WHERE expires_at <= ?', (time.time(),))
+                self._conn.execute(
+                    'DELETE FROM cache WHERE rowid IN ('
+                    'SELECT rowid FROM cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)',
+                    (self.max_rows,)
+                )
+                self._conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def _get(self, kind: str, key: str):
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get((kind, key))
+            if entry and entry[1] > now:
+                self._memory.move_to_end((kind, key))
+                return entry[0]
+
+        if self._conn is None:
+            return None
+
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    'SELECT value, expires_at FROM cache WHERE kind = ? AND key = ? AND expires_at > ?',
+                    (kind, key, now)
+                ).fetchone()
+                if not row:
+                    return None
+                value = json.loads(row[0])
+                self._remember(kind, key, value, row[1])
+            return value
+        except (sqlite3.Error, ValueError):
+            return None
+
+    def _set(self, kind: str, key: str, value, ttl: int):
+        with self._lock:
+            self._remember(kind, key, value, time.time() + ttl)
+
+        if self._conn is None:
+            return
+
+        try:
+            with self._lock:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO cache (kind, key, value, expires_at) VALUES (?, ?, ?, ?)',
+                    (kind, key, json.dumps(value), time.time() + ttl)
+                )
+                self._conn.commit()
+                self._writes += 1
+                due = self._writes % PRUNE_INTERVAL == 0
+        except sqlite3.Error:
+            return
+
+        if due:
+            self.prune()
+
+    def _remember(self, kind: str, key: str, value, expires_at: float):
+        # Callers hold the lock
+        self._memory[(kind, key)] = (value, expires_at)
+        self._memory.move_to_end((kind, key))
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
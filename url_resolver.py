@@ -1,41 +1,116 @@
+import re
+import html
 import requests
 import urllib.parse
-from urllib.parse import urlparse
-import time
-from typing import Tuple, List, Optional
+from urllib.parse import urlparse, urljoin
+from typing import Callable, Dict, Tuple, List, Optional, Union
+from http_session import create_session
+
+# Status codes that carry a Location header to follow
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+# Status codes returned by servers that reject or don't implement HEAD
+HEAD_FALLBACK_STATUSES = (403, 405, 501)
+
+# Most of a page read when looking for a meta refresh, so huge or endless bodies can't stall resolution
+MAX_BODY_BYTES = 64 * 1024
+
+# Largest unread body discarded to keep a connection for reuse - bigger ones are cheaper to drop
+MAX_DRAIN_BYTES = 16 * 1024
+META_TAG_PATTERN = re.compile(rb'<meta\b[^>]*>', re.IGNORECASE)
+REFRESH_PATTERN = re.compile(rb'http-equiv\s*=\s*["\']?refresh', re.IGNORECASE)
+REFRESH_URL_PATTERN = re.compile(rb'content\s*=\s*["\']?\s*\d*\s*;\s*url\s*=\s*["\']?([^"\'>\s]+)', re.IGNORECASE)
+
+# Known URL shortening services
+SHORTENER_DOMAINS = frozenset({
+    'bit.ly', 'tinyurl.com', 't.co', 'goo.gl', 'short.link',
+    'ow.ly', 'buff.ly', 'adf.ly', 'x.co',
+    'cutt.ly', 'rebrand.ly', 'clickmeter.com', 'smarturl.it',
+    'linktr.ee', 'tiny.cc', 'is.gd', 'v.gd', 'tr.im',
+    'url.ie', 'tinycc.com', 'tweez.me', 'su.pr', 'youtu.be',
+    'amzn.to', 'ebay.to', 'fb.me', 'ln.is', 'mcaf.ee',
+    'ift.tt', 'bit.do', 'short.cm', 'href.li', 'link.ly'
+})
+
+def youtube_watch_url(parsed: urllib.parse.ParseResult) -> Optional[str]:
+    """
+    Build the watch page URL a youtu.be link redirects to
+    
+    Args:
+        parsed: Parsed youtu.be URL
+        
+    Returns:
+        The youtube.com watch URL, or None if the link has no video ID
+    """
+    video_id = parsed.path.strip('/')
+    if not video_id or '/' in video_id:
+        return None
+    query = '&' + parsed.query if parsed.query else ''
+    return f"https://www.youtube.com/watch?v={video_id}{query}"
+
+# Shorteners whose destination can be computed from the link itself, without any request
+FAST_PATHS: Dict[str, Callable[[urllib.parse.ParseResult], Optional[str]]] = {
+    'youtu.be': youtube_watch_url,
+}
+
+class ResolutionError(Exception):
+    """Raised when a URL cannot be resolved"""
 
 class URLResolver:
     """Handles resolution of shortened URLs to their final destinations"""
     
-    def __init__(self, timeout: int = 10, max_redirects: int = 20):
+    def __init__(self, timeout: Union[float, Tuple[float, float]] = (3, 7), max_redirects: int = 10,
+                 session: Optional[requests.Session] = None):
         """
         Initialize URL resolver
         
         Args:
-            timeout: Request timeout in seconds
+            timeout: Request timeout in seconds, or a (connect, read) tuple
             max_redirects: Maximum number of redirects to follow
+            session: Shared requests session to reuse connections (a pooled one is created if omitted)
         """
         self.timeout = timeout
         self.max_redirects = max_redirects
-        self.session = requests.Session()
+        self.session = session or create_session()
         
         # Set user agent to avoid blocking
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
     
-    def resolve_url(self, url: str) -> Tuple[Optional[str], List[str]]:
+    def resolve_url(self, url: str,
+                    timeout: Optional[Union[float, Tuple[float, float]]] = None) -> Tuple[Optional[str], List[str]]:
         """
         Resolve a shortened URL to its final destination
         
         Args:
             url: The shortened URL to resolve
+            timeout: Per-request timeout overriding the resolver default
             
         Returns:
             Tuple of (final_url, redirect_chain)
             final_url: The final destination URL or None if resolution failed
             redirect_chain: List of URLs in the redirect chain
         """
+        final_url, redirect_chain, _ = self.resolve_url_status(url, timeout)
+        return final_url, redirect_chain
+    
+    def resolve_url_status(self, url: str,
+                           timeout: Optional[Union[float, Tuple[float, float]]] = None) -> Tuple[Optional[str], List[str], bool]:
+        """
+        Resolve a shortened URL and report whether its destination was actually reached
+        
+        Args:
+            url: The shortened URL to resolve
+            timeout: Per-request timeout overriding the resolver default
+            
+        Returns:
+            Tuple of (final_url, redirect_chain, complete)
+            final_url: The final destination URL or None if resolution failed
+            redirect_chain: List of URLs in the redirect chain
+            complete: True if the final URL answered with a 2xx status. False when the walk
+                stopped on an error status (like 429), a redirect loop or max_redirects
+        """
         if not url or not isinstance(url, str):
             raise ValueError("Invalid URL provided")
         
@@ -52,110 +127,165 @@ class URLResolver:
         except Exception:
             raise ValueError("Invalid URL format")
         
+        # Skip the network entirely for links that encode their destination
+        fast_path = FAST_PATHS.get((parsed.hostname or '').removeprefix('www.'))
+        destination = fast_path(parsed) if fast_path else None
+        if destination:
+            return destination, [url, destination], True
+        
+        timeout = timeout or self.timeout
         redirect_chain = [url]
         current_url = url
+        complete = False
         
         try:
             for i in range(self.max_redirects):
-                # Make HEAD request first to check for redirects without downloading content
-                try:
-                    response = self.session.head(
-                        current_url, 
-                        allow_redirects=False, 
-                        timeout=self.timeout,
-                        verify=True
-                    )
-                except requests.exceptions.SSLError:
-                    # Retry with SSL verification disabled for problematic sites
-                    response = self.session.head(
-                        current_url, 
-                        allow_redirects=False, 
-                        timeout=self.timeout,
-                        verify=False
-                    )
+                response = self.fetch_headers(current_url, timeout)
+                reached = 200 <= response.status_code < 300
                 
                 # Check if this is a redirect
-                if response.status_code in [301, 302, 303, 307, 308]:
+                if response.status_code in REDIRECT_STATUSES:
                     next_url = response.headers.get('Location')
-                    if not next_url:
-                        break
-                    
-                    # Handle relative URLs
-                    if next_url.startswith('/'):
-                        parsed_current = urlparse(current_url)
-                        next_url = f"{parsed_current.scheme}://{parsed_current.netloc}{next_url}"
-                    elif not next_url.startswith(('http://', 'https://')):
-                        # Handle relative URLs without leading slash
-                        parsed_current = urlparse(current_url)
-                        base_path = '/'.join(parsed_current.path.split('/')[:-1])
-                        next_url = f"{parsed_current.scheme}://{parsed_current.netloc}{base_path}/{next_url}"
-                    
-                    if next_url in redirect_chain:
-                        # Circular redirect detected
-                        break
-                    
-                    redirect_chain.append(next_url)
-                    current_url = next_url
-                    
-                elif response.status_code == 200:
-                    # Final destination reached
-                    break
-                    
-                elif response.status_code == 405:
-                    # HEAD method not allowed, try GET
-                    try:
-                        response = self.session.get(
-                            current_url, 
-                            allow_redirects=False, 
-                            timeout=self.timeout,
-                            stream=True,  # Don't download full content
-                            verify=True
-                        )
-                        response.close()  # Close connection immediately
-                        
-                        if response.status_code in [301, 302, 303, 307, 308]:
-                            next_url = response.headers.get('Location')
-                            if next_url and next_url not in redirect_chain:
-                                # Handle relative URLs
-                                if next_url.startswith('/'):
-                                    parsed_current = urlparse(current_url)
-                                    next_url = f"{parsed_current.scheme}://{parsed_current.netloc}{next_url}"
-                                
-                                redirect_chain.append(next_url)
-                                current_url = next_url
-                            else:
-                                break
-                        else:
-                            break
-                            
-                    except requests.exceptions.SSLError:
-                        # Retry with SSL verification disabled
-                        response = self.session.get(
-                            current_url, 
-                            allow_redirects=False, 
-                            timeout=self.timeout,
-                            stream=True,
-                            verify=False
-                        )
-                        response.close()
-                        break
-                        
+                elif response.status_code == 200 and self.is_shortened_url(current_url):
+                    # Some shorteners answer with an interstitial page instead of a redirect
+                    next_url = self.find_meta_refresh(current_url, timeout)
                 else:
-                    # Other status codes - stop here
+                    # Final destination reached (or other status codes) - stop here
+                    complete = reached
+                    break
+                
+                if not next_url:
+                    complete = reached
                     break
+                
+                # Handle relative URLs, including ../ paths, query-only and scheme-relative (//host) ones
+                next_url = urljoin(current_url, next_url.strip())
+                
+                if next_url in redirect_chain:
+                    # Circular redirect detected
+                    break
+                
+                redirect_chain.append(next_url)
+                current_url = next_url
             
-            return current_url, redirect_chain
+            return current_url, redirect_chain, complete
             
         except requests.exceptions.Timeout:
-            raise Exception(f"Request timeout after {self.timeout} seconds")
+            limit = timeout[-1] if isinstance(timeout, tuple) else timeout
+            raise ResolutionError(f"Request timeout after {limit} seconds")
         except requests.exceptions.ConnectionError:
-            raise Exception("Connection error - unable to reach URL")
+            raise ResolutionError("Connection error - unable to reach URL")
         except requests.exceptions.TooManyRedirects:
-            raise Exception("Too many redirects")
+            raise ResolutionError("Too many redirects")
         except requests.exceptions.RequestException as e:
-            raise Exception(f"Request failed: {str(e)}")
+            raise ResolutionError(f"Request failed: {str(e)}")
         except Exception as e:
-            raise Exception(f"Unexpected error during URL resolution: {str(e)}")
+            raise ResolutionError(f"Unexpected error during URL resolution: {str(e)}")
+    
+    def find_meta_refresh(self, url: str,
+                          timeout: Optional[Union[float, Tuple[float, float]]] = None) -> Optional[str]:
+        """
+        Look for a meta refresh redirect at the start of an HTML page
+        
+        At most MAX_BODY_BYTES are read before the connection is closed, so a
+        misbehaving server can't tie up the resolver with a large response.
+        
+        Args:
+            url: URL of the page
+            timeout: Request timeout overriding the resolver default
+            
+        Returns:
+            The refresh target as written in the page, or None if there isn't one
+        """
+        # The page itself already answered, so a failed body read just means no refresh
+        try:
+            response = self._send('GET', url, timeout=timeout or self.timeout, stream=True)
+        except requests.exceptions.RequestException:
+            return None
+        
+        try:
+            if 'html' not in response.headers.get('Content-Type', ''):
+                return None
+            
+            body = bytearray()
+            for chunk in response.iter_content(chunk_size=8192):
+                body += chunk
+                if len(body) >= MAX_BODY_BYTES:
+                    break
+        except requests.exceptions.RequestException:
+            return None
+        finally:
+            response.close()
+        
+        for tag in META_TAG_PATTERN.findall(bytes(body[:MAX_BODY_BYTES])):
+            if REFRESH_PATTERN.search(tag):
+                match = REFRESH_URL_PATTERN.search(tag)
+                if match:
+                    return html.unescape(match.group(1).decode('utf-8', errors='replace'))
+        
+        return None
+    
+    def fetch_headers(self, url: str,
+                      timeout: Optional[Union[float, Tuple[float, float]]] = None) -> requests.Response:
+        """
+        Fetch the response headers for a single redirect hop
+        
+        Uses HEAD so no response body is transferred, and falls back to a streamed
+        GET (closed before the body is read) for servers that reject HEAD.
+        
+        Args:
+            url: URL to request
+            timeout: Request timeout overriding the resolver default
+            
+        Returns:
+            Response carrying the status code and headers
+        """
+        timeout = timeout or self.timeout
+        response = self._send('HEAD', url, timeout=timeout)
+        
+        if response.status_code in HEAD_FALLBACK_STATUSES:
+            response = self._send('GET', url, timeout=timeout, stream=True)  # Don't download full content
+            self._release(response)
+        
+        return response
+    
+    def _release(self, response: requests.Response):
+        """
+        Finish with a streamed response whose body isn't needed
+        
+        Closing a response with an unread body throws its connection away, so the next
+        hop to the same host pays for a new TLS handshake. Short bodies, like those of
+        redirects, are read and discarded so the connection goes back to the pool.
+        
+        Args:
+            response: Streamed response
+        """
+        length = response.headers.get('Content-Length', '')
+        if length.isdigit() and int(length) <= MAX_DRAIN_BYTES:
+            response.raw.drain_conn()
+            response.raw.release_conn()
+        else:
+            response.close()  # Close connection immediately
+    
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a single request without following redirects"""
+        try:
+            return self.session.request(
+                method,
+                url,
+                allow_redirects=False,
+                verify=True,
+                **kwargs
+            )
+        except requests.exceptions.SSLError:
+            # Retry with SSL verification disabled for problematic sites
+            return self.session.request(
+                method,
+                url,
+                allow_redirects=False,
+                verify=False,
+                **kwargs
+            )
     
     def is_shortened_url(self, url: str) -> bool:
         """
@@ -178,18 +308,7 @@ class URLResolver:
             if domain.startswith('www.'):
                 domain = domain[4:]
             
-            # Known URL shortening services
-            shortener_domains = {
-                'bit.ly', 'tinyurl.com', 't.co', 'goo.gl', 'short.link',
-                'ow.ly', 'buff.ly', 'adf.ly', 'short.link', 'x.co',
-                'cutt.ly', 'rebrand.ly', 'clickmeter.com', 'smarturl.it',
-                'linktr.ee', 'tiny.cc', 'is.gd', 'v.gd', 'tr.im',
-                'url.ie', 'tinycc.com', 'tweez.me', 'su.pr', 'youtu.be',
-                'amzn.to', 'ebay.to', 'fb.me', 'ln.is', 'mcaf.ee',
-                'ift.tt', 'bit.do', 'short.cm', 'href.li', 'link.ly'
-            }
-            
-            return domain in shortener_domains
+            return domain in SHORTENER_DOMAINS
             
         except Exception:
             return False
@@ -1,22 +1,65 @@
 import requests
+import ipaddress
 import urllib.parse
 import time
 import json
+import calendar
 from typing import Optional
-from datetime import datetime
+from http_session import create_session
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Parses the UTF-8 bytes of a response body directly, skipping the str decode of response.json()
+json_loads = orjson.loads if orjson is not None else json.loads
+
+# Host names the Wayback Machine can't reach, besides private and loopback IP addresses
+NON_ARCHIVABLE_HOSTS = frozenset({'localhost'})
+NON_ARCHIVABLE_SUFFIXES = tuple('.' + host for host in NON_ARCHIVABLE_HOSTS)
+NON_ARCHIVABLE_TOKENS = ('private', 'internal')
+
+# Format of Wayback Machine snapshot timestamps
+TIMESTAMP_FORMAT = '%Y%m%d%H%M%S'
+
+# (second, timestamp) most recently formatted by wayback_timestamp
+_last_timestamp = (0, '')
+
+def wayback_timestamp() -> str:
+    """
+    Format the current UTC time as a Wayback Machine timestamp
+    
+    The string only changes once a second, so it is reused for every call within
+    the same second instead of being formatted again.
+    
+    Returns:
+        Timestamp like 20240131235959
+    """
+    global _last_timestamp
+    now = int(time.time())
+    second, timestamp = _last_timestamp
+    if now != second:
+        timestamp = time.strftime(TIMESTAMP_FORMAT, time.gmtime(now))
+        _last_timestamp = (now, timestamp)
+    return timestamp
 
 class WaybackArchiver:
     """Handles archiving URLs in the Wayback Machine - optimized for Vercel"""
     
-    def __init__(self, timeout: int = 8):  # Reduced timeout for Vercel
+    def __init__(self, timeout: int = 8, session: Optional[requests.Session] = None,  # Reduced timeout for Vercel
+                 recent_hours: int = 720):
         """
         Initialize Wayback Machine archiver
         
         Args:
             timeout: Request timeout in seconds
+            session: Shared requests session to reuse connections (a pooled one is created if omitted)
+            recent_hours: Age in hours of an existing snapshot that is returned instead of saving again
         """
         self.timeout = timeout
-        self.session = requests.Session()
+        self.recent_hours = recent_hours
+        self.session = session or create_session()
         
         # Wayback Machine API endpoints
         self.save_api_url = "https://web.archive.org/save/"
@@ -46,8 +89,8 @@ class WaybackArchiver:
             url = 'https://' + url
         
         try:
-            # First, check if URL is already archived recently (within last 7 days for speed)
-            existing_archive = self.check_recent_archive(url, hours=168)  # 7 days
+            # First, check if URL is already archived recently - a save takes seconds, the lookup doesn't
+            existing_archive = self.check_recent_archive(url)
             if existing_archive:
                 return existing_archive
             
@@ -69,7 +112,7 @@ class WaybackArchiver:
                     # Try to get the timestamp from the response or use current time
                     timestamp = self.extract_timestamp_from_response(response)
                     if not timestamp:
-                        timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
+                        timestamp = wayback_timestamp()
                     
                     return f"https://web.archive.org/web/{timestamp}/{url}"
                     
@@ -97,22 +140,25 @@ class WaybackArchiver:
         except Exception as e:
             return f"Unexpected error: {str(e)[:50]}..."
     
-    def check_recent_archive(self, url: str, hours: int = 168) -> Optional[str]:  # 7 days default
+    def check_recent_archive(self, url: str, hours: Optional[int] = None) -> Optional[str]:
         """
         Check if URL has been archived recently
         
         Args:
             url: URL to check
-            hours: How many hours back to check for existing archives
+            hours: How many hours back to check for existing archives (defaults to recent_hours)
             
         Returns:
             URL of recent archive if found, None otherwise
         """
+        if hours is None:
+            hours = self.recent_hours
+        
         try:
             # Use availability API to check for recent archives with shorter timeout
             params = {
                 'url': url,
-                'timestamp': datetime.utcnow().strftime('%Y%m%d%H%M%S')
+                'timestamp': wayback_timestamp()
             }
             
             response = self.session.get(
@@ -122,7 +168,7 @@ class WaybackArchiver:
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = json_loads(response.content)
                 
                 # Check if there's an archived snapshot
                 if (data.get('archived_snapshots') and 
@@ -131,15 +177,17 @@ class WaybackArchiver:
                     
                     snapshot = data['archived_snapshots']['closest']
                     snapshot_url = snapshot.get('url')
+                    if snapshot_url and snapshot_url.startswith('http://'):
+                        # The API links snapshots over plain HTTP, unlike the links saves return
+                        snapshot_url = 'https://' + snapshot_url[len('http://'):]
                     snapshot_timestamp = snapshot.get('timestamp')
                     
                     if snapshot_url and snapshot_timestamp:
                         # Check if the snapshot is recent enough
                         try:
-                            snapshot_time = datetime.strptime(snapshot_timestamp, '%Y%m%d%H%M%S')
-                            time_diff = datetime.utcnow() - snapshot_time
+                            snapshot_time = calendar.timegm(time.strptime(snapshot_timestamp, TIMESTAMP_FORMAT))
                             
-                            if time_diff.total_seconds() < (hours * 3600):
+                            if time.time() - snapshot_time < hours * 3600:
                                 return snapshot_url
                         except ValueError:
                             # If we can't parse the timestamp, use the archive anyway
@@ -189,7 +237,7 @@ class WaybackArchiver:
         try:
             params = {
                 'url': url,
-                'timestamp': datetime.utcnow().strftime('%Y%m%d%H%M%S')
+                'timestamp': wayback_timestamp()
             }
             
             response = self.session.get(
@@ -199,7 +247,7 @@ class WaybackArchiver:
             )
             
             if response.status_code == 200:
-                return response.json()
+                return json_loads(response.content)
             else:
                 return {'error': f'API request failed with status {response.status_code}'}
                 
@@ -222,20 +270,21 @@ class WaybackArchiver:
             if not parsed.netloc or not parsed.scheme:
                 return False
             
-            # Check for common non-archivable patterns
-            non_archivable_patterns = [
-                'localhost',
-                '127.0.0.1',
-                '192.168.',
-                '10.',
-                'private',
-                'internal'
-            ]
-            
-            domain = parsed.netloc.lower()
-            for pattern in non_archivable_patterns:
-                if pattern in domain:
-                    return False
+            domain = (parsed.hostname or '').lower()
+            
+            # Private and loopback addresses are checked as addresses, so names that merely
+            # start with digits (like 10.example.com) stay archivable
+            try:
+                address = ipaddress.ip_address(domain)
+                return not (address.is_private or address.is_loopback)
+            except ValueError:
+                pass
+            
+            # Check for common non-archivable host names, including their subdomains (foo.localhost)
+            if (domain in NON_ARCHIVABLE_HOSTS
+                    or domain.endswith(NON_ARCHIVABLE_SUFFIXES)
+                    or any(token in domain for token in NON_ARCHIVABLE_TOKENS)):
+                return False
             
             return True
             